@@ -7,10 +7,17 @@ Requires: pip install chatterbox-tts torch torchaudio
 import os
 import sys
 import re
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
 import torchaudio as ta
 from chatterbox.tts import ChatterboxTTS
+from voice_cache import VoiceConditionalsCache, hash_file
+from render_pool import render_with_pool
+from podcast_manifest import build_manifest, load_manifest, save_manifest, lines_to_render, remove_stale_files
 from concurrent.futures import ThreadPoolExecutor
-import queue
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import SynthesisCache
 
 # File paths
 TEST_MODE = True
@@ -23,6 +30,18 @@ VOICE_PATHS = {
     'achernar': "voices/achernar.wav",
     'poor': "voices/poor_recording.m4a"
 }
+VOICE_CACHE_DIR = "voices/.cache"  # Where computed voice conditionals are saved
+PERSIST_VOICE_CACHE = True  # Set to False to keep voice conditionals in memory only
+POOL_MODE = False  # Render on a pool of CPU worker processes
+POOL_WORKERS = None  # Worker processes in pool mode (None = auto-size from cores and memory)
+POOL_THREADS_PER_WORKER = 2  # torch intra-op threads per worker process
+GENERATE_PARAMS = {  # model.generate() settings, also part of the synthesis cache key
+    'exaggeration': 0.5,
+    'cfg_weight': 0.5,
+    'temperature': 0.8
+}
+USE_SYNTHESIS_CACHE = True  # Reuse audio for lines whose text, voice and settings are unchanged
+INCREMENTAL_MODE = False  # Name files by stable line ID and only re-render changed lines (writes manifest.json)
 
 def split_long_line(line, max_length=MAX_LINE_LENGTH):
     """Split a line if it's longer than max_length, preferring punctuation breaks."""
@@ -75,21 +94,63 @@ def process_text_file(filepath):
     
     return processed_lines
 
-def main():
-    # Use command line args if provided, otherwise use defaults
-    input_file = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
-    
-    # Process text file
-    print(f"Reading text from: {input_file}")
-    text_lines = process_text_file(input_file)
-    
-    if not text_lines:
-        print("Error: No text found in file.")
-        sys.exit(1)
-    
-    print(f"Processed {len(text_lines)} lines of text")
-    print(f"Total text length: {len(" ".join(text_lines))} characters")
+def build_line_jobs(text_lines):
+    """
+    Turn script lines into (k, voice_path, text) jobs, tracking <speaker> tags.
+    
+    Returns:
+        (jobs, speakers) where speakers maps each job's k to its speaker tag
+    """
+    jobs = []
+    speakers = {}
+    user = 'DEFAULT'
+    k = 0
+    for i, line in enumerate(text_lines):
+        if line[0] == '<':
+            user = line[1:-1]
+            continue
+        if not TEST_MODE or i < MAX_TEST_FILES:
+            jobs.append((k, VOICE_PATHS[user], line))
+            speakers[k] = user
+            k += 1
+    return jobs, speakers
+
+def generate_lines(model, jobs, voice_cache):
+    """Generate audio one line at a time, yielding (k, wav)."""
+    for n, (k, voice_path, line) in enumerate(jobs):
+        print(f"[{n+1}/{len(jobs)}] Generating audio for line {k}...")
+        voice_cache.use(voice_path, GENERATE_PARAMS['exaggeration'])
+        yield k, model.generate(line, **GENERATE_PARAMS)
+
+def synthesis_cache_keys(synth_cache, jobs):
+    """Map each job's k to its synthesis cache key."""
+    try:
+        model_id = f"chatterbox-tts {version('chatterbox-tts')}"
+    except PackageNotFoundError:
+        model_id = "chatterbox-tts"
+    voice_ids = {
+        voice_path: f"{voice_path}:{hash_file(voice_path)}"
+        for voice_path in {voice_path for _, voice_path, _ in jobs}
+    }
+    return {
+        k: synth_cache.key("chatterbox", model_id, voice_ids[voice_path], line, GENERATE_PARAMS)
+        for k, voice_path, line in jobs
+    }
+
+def render_jobs(jobs, output_dir, synth_cache, cache_keys):
+    """Render jobs to {k}.wav with the configured mode, storing results in the synthesis cache."""
+    if POOL_MODE:
+        rendered = render_with_pool(
+            jobs, output_dir,
+            workers=POOL_WORKERS,
+            threads_per_worker=POOL_THREADS_PER_WORKER,
+            voice_cache_dir=VOICE_CACHE_DIR,
+            persist_voice_cache=PERSIST_VOICE_CACHE,
+            generate_kwargs=GENERATE_PARAMS
+        )
+        for k, _, filepath in rendered:
+            synth_cache.store(cache_keys[k], filepath)
+        return
     
     # Load model
     print("\nLoading Chatterbox TTS...")
@@ -97,47 +158,88 @@ def main():
     model = ChatterboxTTS.from_pretrained(device=device)
     print(f"Device: {device}")
     
+    # Voice conditionals are computed once per speaker clip instead of per line
+    voice_cache = VoiceConditionalsCache(
+        model,
+        cache_dir=VOICE_CACHE_DIR,
+        persist=PERSIST_VOICE_CACHE
+    )
+    
     # Generate speech
     print("\nGenerating speech...")
-    if not os.path.exists(output_dir):
-      os.makedirs(output_dir)
-    
-    # Create a queue for saving files asynchronously
-    save_queue = queue.Queue()
     
-    def save_audio(filepath, wav_data, sample_rate):
+    def save_audio(filepath, wav_data, sample_rate, cache_key):
         """Save audio file in background."""
         ta.save(filepath, wav_data, sample_rate)
+        synth_cache.store(cache_key, filepath)
         print(f"✓ Saved: {os.path.basename(filepath)}")
     
     # Use thread pool for asynchronous file saving
     with ThreadPoolExecutor(max_workers=2) as executor:
         futures = []
         
-        user = 'DEFAULT'
-        k = 0;
-        for i, line in enumerate(text_lines):
-            if line[0] == '<':
-                user = line[1:-1]
-                continue
-            if not TEST_MODE or i < MAX_TEST_FILES:
-                print(f"[{i+1}/{len(text_lines)}] Generating audio for line {k}...")
-                wav = model.generate(line, audio_prompt_path=VOICE_PATHS[user])
-                
-                # Submit save task to thread pool
-                filepath = f"{output_dir}/{k}.wav"
-                future = executor.submit(save_audio, filepath, wav, model.sr)
-                futures.append(future)
-                
-                print(f"→ Submitted save task for {os.path.basename(filepath)}")
-                k += 1
+        for k, wav in generate_lines(model, jobs, voice_cache):
+            # Submit save task to thread pool
+            filepath = f"{output_dir}/{k}.wav"
+            future = executor.submit(save_audio, filepath, wav, model.sr, cache_keys[k])
+            futures.append(future)
+            
+            print(f"→ Submitted save task for {os.path.basename(filepath)}")
 
         # Wait for all saves to complete
         print("\nWaiting for all saves to complete...")
         for future in futures:
             future.result()
+
+def main():
+    # Use command line args if provided, otherwise use defaults
+    input_file = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
+    
+    # Process text file
+    print(f"Reading text from: {input_file}")
+    text_lines = process_text_file(input_file)
+    
+    if not text_lines:
+        print("Error: No text found in file.")
+        sys.exit(1)
+    
+    print(f"Processed {len(text_lines)} lines of text")
+    print(f"Total text length: {len(" ".join(text_lines))} characters")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    jobs, speakers = build_line_jobs(text_lines)
+    total_jobs = len(jobs)
+    
+    synth_cache = SynthesisCache(enabled=USE_SYNTHESIS_CACHE)
+    cache_keys = synthesis_cache_keys(synth_cache, jobs)
+    
+    manifest = None
+    if INCREMENTAL_MODE:
+        # Files are named by stable line ID; only new or changed lines are rendered
+        manifest = build_manifest([(speakers[k], line, cache_keys[k]) for k, _, line in jobs])
+        cache_keys = {entry['id']: cache_keys[k] for entry, (k, _, _) in zip(manifest, jobs)}
+        jobs = [(entry['id'], voice_path, line) for entry, (_, voice_path, line) in zip(manifest, jobs)]
+        
+        previous = load_manifest(output_dir)
+        removed = remove_stale_files(previous, manifest, output_dir)
+        pending = lines_to_render(previous, manifest, output_dir)
+        jobs = [job for job in jobs if job[0] in pending]
+        print(f"Manifest: {total_jobs - len(jobs)} lines unchanged, {len(jobs)} new or changed, "
+              f"{removed} stale files removed")
+    
+    # Restore unchanged lines from the synthesis cache; only the rest get rendered
+    jobs = [job for job in jobs if not synth_cache.fetch(cache_keys[job[0]], f"{output_dir}/{job[0]}.wav")]
+    print(f"{synth_cache.hits} lines restored from cache, {len(jobs)} to synthesize")
+    
+    if jobs:
+        render_jobs(jobs, output_dir, synth_cache, cache_keys)
+    
+    if manifest is not None:
+        save_manifest(output_dir, manifest)
     
-    print(f"\nDone! All {len(text_lines)} audio files saved to {output_dir}")
+    synth_cache.print_stats()
+    print(f"\nDone! All {total_jobs} audio files saved to {output_dir}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
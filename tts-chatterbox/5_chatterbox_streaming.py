@@ -2,6 +2,12 @@
 """
 Chatterbox TTS with real-time audio streaming instead of saving to files.
 This example demonstrates streaming generated audio directly to speakers.
+
+Audio is played while the sentence is still being generated: stream_generate
+yields chunks as speech tokens are produced, and a bounded look-ahead queue
+feeds the playback thread. Generation moves on to the next sentences while
+the current one plays (up to LOOKAHEAD_SECONDS of audio ahead), so sentences
+follow each other without dead air.
 """
 
 import torch
@@ -11,11 +17,14 @@ import pyaudio
 import threading
 import queue
 import time
+from voice_cache import VoiceConditionalsCache
+from stream_generate import stream_generate
 
 # Constants
 VOICE_PATH = "voices/default.wav"
 TEST_MODE = True  # Set to False to process all text
 CHUNK_SIZE = 1024  # Audio chunk size for streaming
+LOOKAHEAD_SECONDS = 5.0  # Max audio generated ahead of playback before generation waits
 
 def initialize_model():
     """Initialize the ChatterboxTTS model."""
@@ -69,30 +78,35 @@ def audio_streamer(audio_queue, sample_rate):
         stream.close()
         p.terminate()
 
-def generate_and_stream(model, text, audio_queue, voice_path=None):
-    """Generate audio and add to streaming queue."""
+def generate_and_stream(model, text, audio_queue, voice_cache=None, voice_path=None):
+    """Generate audio incrementally and add it to the streaming queue as it arrives."""
     print(f"Generating audio for: '{text[:50]}...'")
     
-    # Generate audio
-    wav = model.generate(text, audio_prompt_path=voice_path)
-    
-    # Convert tensor to numpy array
-    if isinstance(wav, torch.Tensor):
-        audio_data = wav.cpu().numpy()
-    else:
-        audio_data = np.array(wav)
-    
-    # Ensure 1D array
-    if len(audio_data.shape) > 1:
-        audio_data = audio_data.squeeze()
+    if voice_path and voice_cache is not None:
+        voice_cache.use(voice_path)
     
-    # Add to queue in chunks
-    chunk_samples = CHUNK_SIZE
-    for i in range(0, len(audio_data), chunk_samples):
-        chunk = audio_data[i:i + chunk_samples]
-        audio_queue.put(chunk)
+    start_time = time.perf_counter()
+    first_audio = None
+    total_samples = 0
     
-    print(f"Audio generated and queued for streaming")
+    for audio_data in stream_generate(model, text):
+        # Ensure 1D float32 array
+        audio_data = np.asarray(audio_data, dtype=np.float32).squeeze()
+        
+        if first_audio is None:
+            first_audio = time.perf_counter() - start_time
+            print(f"  First audio after {first_audio:.2f}s")
+        
+        # Add to queue in chunks (blocks while the look-ahead buffer is full)
+        chunk_samples = CHUNK_SIZE
+        for i in range(0, len(audio_data), chunk_samples):
+            chunk = audio_data[i:i + chunk_samples]
+            audio_queue.put(chunk)
+        total_samples += len(audio_data)
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"Audio generated and queued for streaming "
+          f"({total_samples / model.sr:.1f}s of audio in {elapsed:.1f}s)")
 
 def main():
     # Initialize model
@@ -110,8 +124,12 @@ def main():
         texts = texts[:2]  # Only process first 2 sentences in test mode
         print("TEST MODE: Processing only first 2 sentences")
     
-    # Create audio queue
-    audio_queue = queue.Queue()
+    # Voice conditionals are prepared once and reused for every sentence
+    voice_cache = VoiceConditionalsCache(model)
+    
+    # Create audio queue, bounded so generation stays at most LOOKAHEAD_SECONDS ahead
+    lookahead_chunks = max(1, int(LOOKAHEAD_SECONDS * model.sr / CHUNK_SIZE))
+    audio_queue = queue.Queue(maxsize=lookahead_chunks)
     
     # Start audio streaming thread
     stream_thread = threading.Thread(
@@ -125,10 +143,7 @@ def main():
         # Generate and stream each text
         for i, text in enumerate(texts):
             print(f"\n[{i+1}/{len(texts)}] Processing text...")
-            generate_and_stream(model, text, audio_queue, VOICE_PATH)
-            
-            # Small delay between sentences
-            time.sleep(0.5)
+            generate_and_stream(model, text, audio_queue, voice_cache, VOICE_PATH)
         
         # Wait for queue to empty
         print("\nWaiting for audio to finish playing...")
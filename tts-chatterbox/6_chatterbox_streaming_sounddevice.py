@@ -2,20 +2,26 @@
 """
 Chatterbox TTS with real-time audio streaming using sounddevice.
 This provides a simpler alternative to pyaudio for audio streaming.
+
+Sentences are synthesized on a background worker (up to PREFETCH_DEPTH ahead)
+while the current one plays, so playback continues without dead air.
 """
 
 import torch
 import numpy as np
 from chatterbox.tts import ChatterboxTTS
 import sounddevice as sd
-import queue
 import threading
 import time
+from sentence_pipeline import prefetch
+from ring_buffer import AudioRingBuffer
 
 # Constants
 VOICE_PATH = "voices/default.wav"
 TEST_MODE = True  # Set to False to process all text
-BUFFER_SIZE = 0.1  # Buffer size in seconds
+BUFFER_SIZE = 0.02  # Callback block size in seconds
+RING_BUFFER_SECONDS = 2.0  # Audio buffered ahead of the callback
+PREFETCH_DEPTH = 2  # Sentences synthesized ahead of the one playing
 
 def initialize_model():
     """Initialize the ChatterboxTTS model."""
@@ -33,16 +39,8 @@ def initialize_model():
     print("Model loaded successfully!")
     return model
 
-def stream_audio(audio_data, sample_rate):
-    """Stream audio data directly using sounddevice."""
-    print(f"Streaming audio at {sample_rate}Hz...")
-    
-    # Play audio blocking
-    sd.play(audio_data, sample_rate)
-    sd.wait()  # Wait until playback is finished
-
-def generate_and_stream_immediate(model, text, voice_path=None):
-    """Generate audio and stream immediately."""
+def synthesize(model, text, voice_path=None):
+    """Generate audio for text as a 1D float32 numpy array."""
     print(f"Generating: '{text[:50]}...'")
     
     # Generate audio
@@ -61,80 +59,63 @@ def generate_and_stream_immediate(model, text, voice_path=None):
     if audio_data.dtype != np.float32:
         audio_data = audio_data.astype(np.float32)
     
-    # Stream the audio
-    stream_audio(audio_data, model.sr)
+    return audio_data
+
+def stream_sentences(model, texts, voice_path=None):
+    """Play sentences back to back while the following ones are generated."""
+    print(f"Streaming audio at {model.sr}Hz...")
+    
+    # One output stream for all sentences; blocking writes keep playback gapless
+    with sd.OutputStream(samplerate=model.sr, channels=1, dtype='float32') as stream:
+        sentences = prefetch(lambda text: synthesize(model, text, voice_path), texts, depth=PREFETCH_DEPTH)
+        for i, (text, audio_data) in enumerate(sentences):
+            print(f"[{i+1}/{len(texts)}] Playing: '{text[:50]}...'")
+            stream.write(audio_data.reshape(-1, 1))
 
 def continuous_streaming_demo(model):
-    """Demonstrate continuous streaming with a queue-based approach."""
+    """Demonstrate continuous streaming through a ring buffer read by the audio callback."""
     print("\n=== Continuous Streaming Demo ===")
     
     texts = [
         "This demonstrates continuous audio streaming.",
         "Each sentence is generated and played seamlessly.",
-        "The queue ensures smooth playback without gaps."
+        "The ring buffer ensures smooth playback without gaps."
     ]
     
     if TEST_MODE:
         texts = texts[:2]
     
-    audio_queue = queue.Queue()
+    # Preallocated ring buffer; the callback reads it without locking or allocating
+    ring = AudioRingBuffer(int(model.sr * RING_BUFFER_SECONDS))
     
     def audio_callback(outdata, frames, time_info, status):
         """Callback for continuous audio streaming."""
         if status:
             print(f"Stream status: {status}")
         
-        try:
-            data = audio_queue.get_nowait()
-            if len(data) < frames:
-                # Pad with zeros if needed
-                outdata[:len(data)] = data.reshape(-1, 1)
-                outdata[len(data):] = 0
-            else:
-                outdata[:] = data[:frames].reshape(-1, 1)
-                # Put remaining data back
-                if len(data) > frames:
-                    audio_queue.put(data[frames:])
-        except queue.Empty:
-            outdata.fill(0)
+        ring.read_into(outdata[:, 0])
     
     # Start output stream
     with sd.OutputStream(
         samplerate=model.sr,
         channels=1,
+        dtype='float32',
         callback=audio_callback,
         blocksize=int(model.sr * BUFFER_SIZE)
     ):
-        for text in texts:
-            print(f"Generating: '{text[:40]}...'")
-            
-            # Generate audio
-            wav = model.generate(text, audio_prompt_path=VOICE_PATH)
-            
-            # Convert to numpy
-            if isinstance(wav, torch.Tensor):
-                audio_data = wav.cpu().numpy()
-            else:
-                audio_data = np.array(wav)
-            
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data.squeeze()
-            
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            
-            # Add to queue
-            audio_queue.put(audio_data)
-            
-            # Wait a bit for processing
-            time.sleep(0.1)
+        sentences = prefetch(lambda text: synthesize(model, text, VOICE_PATH), texts, depth=PREFETCH_DEPTH)
+        for text, audio_data in sentences:
+            # Blocks while the ring buffer is full
+            ring.write(audio_data)
+        ring.finish()
         
-        # Wait for queue to empty
-        while not audio_queue.empty():
-            time.sleep(0.1)
+        # Wait for the buffer to drain
+        ring.wait_until_empty()
         
         # Final wait for audio to finish
         time.sleep(0.5)
+    
+    print(f"Underruns: {ring.underruns}, writer waits (buffer full): {ring.writer_waits}")
 
 def main():
     # Initialize model
@@ -156,10 +137,7 @@ def main():
     if TEST_MODE:
         texts = texts[:2]
     
-    for i, text in enumerate(texts):
-        print(f"\n[{i+1}/{len(texts)}]")
-        generate_and_stream_immediate(model, text, VOICE_PATH)
-        time.sleep(0.3)  # Small pause between sentences
+    stream_sentences(model, texts, VOICE_PATH)
     
     # Continuous streaming demo
     print("\n" + "="*50)
@@ -1,25 +1,37 @@
 #!/usr/bin/env python3
 import os
 import sys
+import json
+import math
+from functools import lru_cache
 import torch
 import torchaudio as ta
 from pathlib import Path
+from podcast_manifest import load_manifest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import WavWriter
 
 DEFAULT_GAP_SECONDS = -0.5
 INPUT_DIR = "outputs/nanite-podcast"
 OUTPUT_FILE = "outputs/nanite-podcast-compiled.wav"
-OVERLAP_FADE = 0.9
+CROSSFADE_CURVE = "equal_power"  # Overlap crossfade: equal_power, linear or logarithmic
+STATE_VERSION = 2  # Bump when the mixing changes so old build state is not reused
+COPY_BLOCK_SECONDS = 10  # Block size when copying reused audio from a previous build
+TARGET_LOUDNESS = None  # LUFS to normalize each segment to (tts_common.loudness), None to leave as is
 
-def compile_audio_files(input_dir, output_file, gap_seconds=0.5):
+def list_segment_files(input_dir):
     """
-    Compile multiple WAV files with gaps or overlaps between them.
-    
-    Args:
-        input_dir: Directory containing WAV files
-        output_file: Output compiled WAV file
-        gap_seconds: Gap/overlap in seconds between files (default 0.5)
-                        Positive values create gaps, negative values create overlaps
+    Return [(filename, signature)] in playback order.
+
+    Uses manifest.json (written by 4_chatterbox_podcast.py in incremental mode)
+    when present, otherwise numbered {k}.wav files. The signature identifies a
+    segment's content for incremental rebuilds.
     """
+    manifest = load_manifest(input_dir)
+    if manifest is not None:
+        return [(line['file'], line['hash']) for line in manifest]
+
     # Get all WAV files and sort them numerically
     wav_files = []
     for filename in os.listdir(input_dir):
@@ -27,121 +39,284 @@ def compile_audio_files(input_dir, output_file, gap_seconds=0.5):
             # Extract number from filename for proper sorting
             num = int(filename.replace('.wav', ''))
             wav_files.append((num, filename))
-    
+
     # Sort by number
     wav_files.sort(key=lambda x: x[0])
-    wav_files = [f[1] for f in wav_files]
-    
-    print(wav_files)
-    
-    if not wav_files:
+
+    segments = []
+    for _, filename in wav_files:
+        stat = os.stat(os.path.join(input_dir, filename))
+        segments.append((filename, f"{stat.st_size}:{stat.st_mtime_ns}"))
+    return segments
+
+def plan_placement(lengths, gap_samples):
+    """
+    Work out where each segment lands in the compiled output.
+
+    Every segment occupies [start, start + length); its first `mix` samples
+    are blended with what is already there (the overlap with the previous
+    segment), the rest are written as-is.
+
+    Returns:
+        List of (start, end, mix), one per segment
+    """
+    placements = []
+    current_pos = 0
+    prev_segment_length = 0
+    for i, segment_length in enumerate(lengths):
+        mix = 0
+
+        if i == 0:
+            # First segment starts at beginning
+            start = 0
+        elif prev_segment_length <= (gap_samples * 2):
+            # Previous segment too short for the gap, just append
+            start = current_pos
+        elif gap_samples >= 0:
+            # Positive gap between segments
+            start = current_pos + gap_samples
+        else:
+            # Negative gap = overlap between segments
+            # (capped in case segment is shorter than the overlap)
+            mix = min(-gap_samples, segment_length, current_pos)
+            start = current_pos - mix
+
+        end = start + segment_length
+        placements.append((start, end, mix))
+        current_pos = max(current_pos, end)
+        prev_segment_length = segment_length
+
+    return placements
+
+@lru_cache(maxsize=64)
+def crossfade_ramps(length, curve=CROSSFADE_CURVE):
+    """
+    Fade-out and fade-in gain ramps for an overlap of `length` samples.
+
+    Cached per (length, curve); most overlaps share the same length so the
+    ramps are computed once per compile.
+
+    Returns:
+        (fade_out, fade_in) tensors of shape (length,)
+    """
+    t = (torch.arange(length, dtype=torch.float32) + 0.5) / length
+    if curve == "equal_power":
+        # Constant total power for uncorrelated signals (sin^2 + cos^2 = 1)
+        fade_in = torch.sin(t * (math.pi / 2))
+        fade_out = torch.cos(t * (math.pi / 2))
+    elif curve == "linear":
+        fade_in = t
+        fade_out = 1.0 - t
+    elif curve == "logarithmic":
+        # Fast rise, slow settle: log10 maps 1..10 onto 0..1
+        fade_in = torch.log10(1.0 + 9.0 * t)
+        fade_out = fade_in.flip(0)
+    else:
+        raise ValueError(f"Unknown crossfade curve: {curve}")
+    return fade_out, fade_in
+
+def crossfade(outgoing, incoming, curve=CROSSFADE_CURVE):
+    """Crossfade `incoming` into `outgoing` in place (both shaped (channels, length))."""
+    fade_out, fade_in = crossfade_ramps(outgoing.shape[1], curve)
+    return outgoing.mul_(fade_out).addcmul_(incoming, fade_in)
+
+def load_segment(path):
+    """Load a segment, loudness-normalized to TARGET_LOUDNESS when set (length is unchanged)."""
+    segment, sample_rate = ta.load(path)
+    if TARGET_LOUDNESS is not None:
+        from tts_common.loudness import normalize_loudness
+        normalized, _ = normalize_loudness(segment.numpy(), sample_rate, TARGET_LOUDNESS)
+        segment = torch.from_numpy(normalized.astype("float32"))
+    return segment
+
+def write_frames(writer, audio):
+    """Write a (channels, frames) tensor as interleaved float32 samples."""
+    if audio.shape[1] > 0:
+        writer.write(audio.t().contiguous().to(torch.float32).numpy())
+
+def load_build_state(state_file):
+    try:
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_build_state(state_file, state):
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, state_file)
+
+def find_resume_index(old_state, settings, signatures, placements, output_file):
+    """
+    Find the first segment that has to be re-mixed.
+
+    Everything before the previous segment's overlap tail is final once the
+    segments up to it are unchanged. The tail itself is rebuilt from the raw
+    previous segment, which is only possible when that segment's own blended
+    head doesn't reach into its tail; otherwise step back another segment.
+
+    Returns:
+        (unchanged, resume): number of leading segments identical to the previous
+        build, and the index to resume mixing from (0 = full rebuild)
+    """
+    if not old_state or not os.path.exists(output_file):
+        return 0, 0
+    if any(old_state.get(key) != value for key, value in settings.items()):
+        print("Compile settings changed, rebuilding everything")
+        return 0, 0
+
+    old_segments = old_state['segments']
+    resume = 0
+    while (resume < len(signatures) and resume < len(old_segments)
+           and old_segments[resume]['signature'] == signatures[resume]):
+        resume += 1
+    unchanged = resume
+
+    overlap_samples = max(0, -settings['gap_samples'])
+    while resume > 0:
+        start, end, mix = placements[resume - 1]
+        if overlap_samples == 0 or start + mix <= end - overlap_samples:
+            break
+        resume -= 1
+    return unchanged, resume
+
+def compile_audio_files(input_dir, output_file, gap_seconds=0.5, incremental=True):
+    """
+    Compile multiple WAV files with gaps or overlaps between them.
+
+    Args:
+        input_dir: Directory containing WAV files
+        output_file: Output compiled WAV file
+        gap_seconds: Gap/overlap in seconds between files (default 0.5)
+                        Positive values create gaps, negative values create overlaps
+        incremental: Reuse the previous output up to the first changed segment
+                     (build state is kept next to the output as <output>.state.json)
+    """
+    segment_files = list_segment_files(input_dir)
+
+    print([filename for filename, _ in segment_files])
+
+    if not segment_files:
         print("No WAV files found in the directory")
         return
-    
-    print(f"Found {len(wav_files)} WAV files to compile")
-    
+
+    print(f"Found {len(segment_files)} WAV files to compile")
+
     # Read first file to get audio parameters
-    first_file = os.path.join(input_dir, wav_files[0])
-    waveform, sample_rate = ta.load(first_file)
-    
+    first_info = ta.info(os.path.join(input_dir, segment_files[0][0]))
+    sample_rate = first_info.sample_rate
+
     # Get number of channels
-    num_channels = waveform.shape[0]
-    
+    num_channels = first_info.num_channels
+
     # Calculate overlap in samples (negative for overlap, positive for gap)
     gap_samples = int(gap_seconds * sample_rate)
-    
-    # Load all audio files first
-    audio_segments = []
-    for i, filename in enumerate(wav_files):
-        filepath = os.path.join(input_dir, filename)
-        print(f"Loading {i+1}/{len(wav_files)}: {filename}")
-        
-        # Load audio file
-        waveform, file_sample_rate = ta.load(filepath)
-        
+
+    # Read segment lengths from the headers; audio is only loaded where it gets mixed
+    segments = []
+    for filename, signature in segment_files:
+        info = ta.info(os.path.join(input_dir, filename))
+
         # Verify parameters match
-        if file_sample_rate != sample_rate or waveform.shape[0] != num_channels:
+        if info.sample_rate != sample_rate or info.num_channels != num_channels:
             print(f"Warning: {filename} has different audio parameters, skipping")
             continue
-        
-        audio_segments.append(waveform)
-    
-    if not audio_segments:
+
+        segments.append((filename, signature, info.num_frames))
+
+    if not segments:
         print("No valid audio segments found")
         return
-    
-    # Calculate total length needed
-    total_length = 0
-    for i, segment in enumerate(audio_segments):
-        if i == 0:
-            total_length += segment.shape[1]
-        else:
-            # Add length minus overlap
-            total_length += segment.shape[1] - max(0, -gap_samples)
-    
-    # Create output tensor
-    compiled_audio = torch.zeros(num_channels, total_length)
-    
-    # Place audio segments with overlaps
-    current_pos = 0
-    prev_segment_length = 0
-    for i, segment in enumerate(audio_segments):
-        segment_length = segment.shape[1]
-        
-        if i == 0:
-            print(f"{i} : ({segment_length}) {current_pos} - begin")
-            # First segment starts at beginning
-            compiled_audio[:, :segment_length] = segment
-            current_pos = segment_length
-        else:
-            # Calculate start position based on overlap
-            start_pos = current_pos + gap_samples
-            end_pos = start_pos + segment_length
-            if prev_segment_length <= (gap_samples * 2):
-                print(f"{i} : ({segment_length}) {current_pos} - gapless append")
-                # No actual overlap, just place the segment
-                end_pos = current_pos + segment_length
-                compiled_audio[:, current_pos:end_pos] = segment
-            elif gap_samples >= 0:
-                # Positive overlap - gap between segments
-                compiled_audio[:, start_pos:end_pos] = segment
-            else:
-                # Negative gap = overlap between segments
-                # Calculate how much the segments overlap
-                overlap_samples = -gap_samples
-                overlap_length = min(overlap_samples, segment_length) # incase segment is shorter than overlap
-                
-                print(f"{i} : ({segment_length}) {current_pos} - ({overlap_samples}) {overlap_length}")
-        
-                if overlap_length <= 0 or prev_segment_length < gap_samples:
-                    # No actual overlap, just place the segment
-                    compiled_audio[:, start_pos:end_pos] = segment
-                else:
-                    # Blend the overlapping portions (50/50 mix)
-                    overlap_pos = current_pos - overlap_length
-                    compiled_audio[:, overlap_pos:current_pos] = (
-                        compiled_audio[:, overlap_pos:current_pos] * OVERLAP_FADE +
-                        segment[:, :overlap_length] * OVERLAP_FADE
-                    )
-                    
-                    # Add the rest of the segment after the overlap
-                    if overlap_length < segment_length:
-                        remaining_audio = segment[:, overlap_length:]
-                        remaining_length = remaining_audio.shape[1]
-                        end_pos = current_pos + remaining_length
-                        compiled_audio[:, current_pos:end_pos] = remaining_audio
-            
-            current_pos = end_pos
-        
-        prev_segment_length = segment_length
-    
-    # Save compiled audio
-    ta.save(output_file, compiled_audio, sample_rate)
-    
-    print(f"\nSuccessfully compiled {len(wav_files)} files into {output_file}")
-    
+
+    lengths = [length for _, _, length in segments]
+    placements = plan_placement(lengths, gap_samples)
+    total_length = max(end for _, end, _ in placements)
+
+    settings = {
+        'version': STATE_VERSION,
+        'sample_rate': sample_rate,
+        'num_channels': num_channels,
+        'gap_samples': gap_samples,
+        'crossfade_curve': CROSSFADE_CURVE,
+        'target_loudness': TARGET_LOUDNESS
+    }
+    state_file = f"{output_file}.state.json"
+    old_state = load_build_state(state_file) if incremental else None
+    unchanged, resume = find_resume_index(
+        old_state, settings, [sig for _, sig, _ in segments], placements, output_file
+    )
+
+    if unchanged == len(segments) == len(old_state['segments']):
+        print(f"\n{output_file} is up to date")
+        return
+
+    # Stream the mix straight to disk. Only `tail` (at most one overlap long)
+    # stays in memory, since the next segment may still blend into it.
+    overlap_samples = max(0, -gap_samples)
+    tmp_file = f"{output_file}.tmp"
+    with WavWriter(tmp_file, sample_rate, num_channels, sample_width=4, float_samples=True) as writer:
+        tail = torch.zeros(num_channels, 0)
+
+        if resume > 0:
+            # Copy the previous output up to the last unchanged segment's tail,
+            # then restore that tail from the raw segment so it can be re-mixed
+            prev_start, prev_end, _ = placements[resume - 1]
+            keep = prev_end - overlap_samples
+            block = int(COPY_BLOCK_SECONDS * sample_rate)
+            for offset in range(0, keep, block):
+                previous_audio, _ = ta.load(output_file, frame_offset=offset, num_frames=min(block, keep - offset))
+                write_frames(writer, previous_audio)
+            if keep < prev_end:
+                prev_segment = load_segment(os.path.join(input_dir, segments[resume - 1][0]))
+                tail = prev_segment[:, keep - prev_start:].clone()
+            print(f"Reusing {resume}/{len(segments)} segments ({keep / sample_rate:.1f}s) from previous build")
+
+        # Place audio segments with overlaps
+        for i in range(resume, len(segments)):
+            filename = segments[i][0]
+            start, end, mix = placements[i]
+            print(f"Mixing {i+1}/{len(segments)}: {filename} ({end - start}) {start} - ({mix})")
+
+            segment = load_segment(os.path.join(input_dir, filename))
+
+            tail_start = writer.frames_written
+            tail_end = tail_start + tail.shape[1]
+            if start > tail_end:
+                # Gap between segments: flush the tail and write silence
+                write_frames(writer, tail)
+                write_frames(writer, torch.zeros(num_channels, start - tail_end))
+                tail = torch.zeros(num_channels, 0)
+                tail_start = start
+
+            if mix > 0:
+                # Crossfade the overlapping portions
+                offset = start - tail_start
+                crossfade(tail[:, offset:offset + mix], segment[:, :mix])
+
+            # Add the rest of the segment after the overlap, keeping the last
+            # overlap's worth of audio back for the next segment to blend into
+            pending = torch.cat([tail, segment[:, mix:]], dim=1)
+            commit = max(0, pending.shape[1] - overlap_samples)
+            write_frames(writer, pending[:, :commit])
+            tail = pending[:, commit:].clone()
+
+        write_frames(writer, tail)
+
+    os.replace(tmp_file, output_file)
+    save_build_state(state_file, {
+        **settings,
+        'total_length': total_length,
+        'segments': [
+            {'file': filename, 'signature': signature, 'length': length}
+            for filename, signature, length in segments
+        ]
+    })
+
+    print(f"\nSuccessfully compiled {len(segments)} files into {output_file}")
+
     # Calculate total duration
-    duration = compiled_audio.shape[1] / float(sample_rate)
+    duration = total_length / float(sample_rate)
     minutes = int(duration // 60)
     seconds = duration % 60
     print(f"Total duration: {minutes}:{seconds:05.2f}")
@@ -151,7 +326,7 @@ if __name__ == "__main__":
     input_directory = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
     output_filename = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_FILE
     gap_seconds     = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_GAP_SECONDS
-    
+
     # Use negative value for overlap (e.g., -0.5 for 0.5 second overlap)
     # Use positive value for gap (e.g., 0.5 for 0.5 second gap)
-    compile_audio_files(input_directory, output_filename, gap_seconds)
\ No newline at end of file
+    compile_audio_files(input_directory, output_filename, gap_seconds)
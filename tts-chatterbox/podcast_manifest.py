@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Manifest for incremental podcast builds.
+
+Each script line gets a stable ID derived from its speaker and text (plus an
+occurrence counter for repeated lines), so inserting or deleting a line no
+longer renames every file after it. The manifest records the ordered lines
+with their content hash; the renderer only regenerates lines whose hash
+changed and `compile_podcast.py` uses it for segment order.
+
+manifest.json:
+    {"version": 1, "lines": [{"id", "hash", "speaker", "text", "file"}, ...]}
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+ID_LENGTH = 12  # Hex characters of the line hash used as the line ID
+
+
+def line_id(speaker, text, occurrence=0):
+    """Stable ID for a script line; repeated lines get a -N suffix."""
+    digest = hashlib.sha256(f"{speaker}\n{text}".encode('utf-8')).hexdigest()[:ID_LENGTH]
+    return digest if occurrence == 0 else f"{digest}-{occurrence}"
+
+
+def build_manifest(entries):
+    """
+    Build manifest lines from script entries.
+
+    Args:
+        entries: List of (speaker, text, content_hash) in script order. The
+                 hash should cover everything that affects the audio (text,
+                 voice clip, synthesis settings).
+
+    Returns:
+        List of manifest line dicts in script order
+    """
+    seen = Counter()
+    lines = []
+    for speaker, text, content_hash in entries:
+        base = (speaker, text)
+        lid = line_id(speaker, text, seen[base])
+        seen[base] += 1
+        lines.append({
+            'id': lid,
+            'hash': content_hash,
+            'speaker': speaker,
+            'text': text,
+            'file': f"{lid}.wav"
+        })
+    return lines
+
+
+def load_manifest(directory):
+    """Return manifest lines from a directory, or None if there is no manifest."""
+    path = Path(directory) / MANIFEST_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Warning: ignoring unreadable manifest {path} ({e})")
+        return None
+    if data.get('version') != MANIFEST_VERSION:
+        print(f"Warning: ignoring manifest {path} with unknown version {data.get('version')}")
+        return None
+    return data.get('lines', [])
+
+
+def save_manifest(directory, lines):
+    """Write the manifest atomically."""
+    path = Path(directory) / MANIFEST_FILE
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'lines': lines}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def lines_to_render(previous, current, directory):
+    """IDs of current lines that are new, changed, or missing their audio file."""
+    previous_hashes = {line['id']: line['hash'] for line in previous or []}
+    return {
+        line['id'] for line in current
+        if previous_hashes.get(line['id']) != line['hash']
+        or not (Path(directory) / line['file']).exists()
+    }
+
+
+def remove_stale_files(previous, current, directory):
+    """Delete audio for lines that are no longer in the script. Returns the count removed."""
+    current_files = {line['file'] for line in current}
+    removed = 0
+    for line in previous or []:
+        if line['file'] not in current_files:
+            path = Path(directory) / line['file']
+            if path.exists():
+                path.unlink()
+                removed += 1
+    return removed
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Multi-process CPU render pool for Chatterbox.
+
+Each worker process loads ChatterboxTTS once (with its own torch intra-op
+thread count), pulls line jobs from the pool's shared queue and writes
+`{k}.wav` results. The parent collects results back into job order.
+
+Jobs are `(k, voice_path, text)` tuples.
+"""
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+import torchaudio as ta
+from chatterbox.tts import ChatterboxTTS
+
+from voice_cache import CACHE_DIR, VoiceConditionalsCache
+
+THREADS_PER_WORKER = 2  # torch intra-op threads per worker process
+WORKER_MEMORY_GB = 4.0  # Approximate resident memory of one loaded model
+
+# Per-process state, set up once by _init_worker
+_model = None
+_voice_cache = None
+
+
+def available_memory_bytes():
+    """Memory available for new processes, or None if it can't be determined."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def usable_cores():
+    """CPU cores this process is allowed to run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def auto_worker_count(threads_per_worker=THREADS_PER_WORKER, worker_memory_gb=WORKER_MEMORY_GB):
+    """Size the pool from core count and available memory."""
+    by_cores = max(1, usable_cores() // threads_per_worker)
+    memory = available_memory_bytes()
+    if memory is None:
+        return by_cores
+    by_memory = max(1, int(memory // (worker_memory_gb * 1024 ** 3)))
+    return min(by_cores, by_memory)
+
+
+def _init_worker(threads_per_worker, voice_cache_dir, persist_voice_cache):
+    """Load the model once per worker process."""
+    global _model, _voice_cache
+    torch.set_num_threads(threads_per_worker)
+    _model = ChatterboxTTS.from_pretrained(device="cpu")
+    _voice_cache = VoiceConditionalsCache(_model, cache_dir=voice_cache_dir, persist=persist_voice_cache)
+    print(f"Worker {os.getpid()} ready ({threads_per_worker} threads)")
+
+
+def _render_job(job, output_dir, generate_kwargs):
+    """Generate and save one line inside a worker."""
+    k, voice_path, text = job
+    if voice_path is not None:
+        _voice_cache.use(voice_path, generate_kwargs.get('exaggeration', 0.5))
+    wav = _model.generate(text, **generate_kwargs)
+    filepath = os.path.join(output_dir, f"{k}.wav")
+    ta.save(filepath, wav, _model.sr)
+    return k, filepath
+
+
+def render_with_pool(jobs, output_dir, workers=None, threads_per_worker=THREADS_PER_WORKER,
+                     voice_cache_dir=CACHE_DIR, persist_voice_cache=True, generate_kwargs=None):
+    """
+    Render jobs across a pool of CPU worker processes.
+
+    Args:
+        jobs: List of (k, voice_path, text) tuples
+        output_dir: Directory for the `{k}.wav` files
+        workers: Number of worker processes (default: auto-size from cores and memory)
+        threads_per_worker: torch intra-op threads per worker
+        voice_cache_dir: Shared directory for persisted voice conditionals
+        persist_voice_cache: Share voice conditionals between workers through disk
+        generate_kwargs: Extra arguments for model.generate (exaggeration, cfg_weight, ...)
+
+    Returns:
+        List of (k, voice_path, filepath) in job order
+    """
+    if not jobs:
+        return []
+
+    if workers is None:
+        workers = auto_worker_count(threads_per_worker)
+    workers = max(1, min(workers, len(jobs)))
+    print(f"Rendering {len(jobs)} lines with {workers} workers x {threads_per_worker} threads")
+
+    # spawn keeps workers independent of the parent's torch thread pools
+    context = mp.get_context("spawn")
+    rendered = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(threads_per_worker, voice_cache_dir, persist_voice_cache)
+    ) as pool:
+        futures = [pool.submit(_render_job, job, output_dir, generate_kwargs or {}) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            k, filepath = future.result()
+            rendered[k] = filepath
+            print(f"✓ [{done}/{len(jobs)}] Saved: {os.path.basename(filepath)}")
+
+    return [(k, voice_path, rendered[k]) for k, voice_path, _ in jobs]
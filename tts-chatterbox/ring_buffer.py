@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Single-producer / single-consumer audio ring buffer.
+
+The generator thread writes samples, the audio callback reads them. Storage
+is a preallocated NumPy array; reads copy straight from slices of it into the
+callback's output buffer, so the real-time thread never allocates or takes a
+lock. Each side only advances its own counter (a plain int store, atomic under
+the GIL), which is what keeps it lock-free.
+
+Usage:
+    ring = AudioRingBuffer(capacity=model.sr * 2)
+    # generator thread
+    ring.write(audio_data)
+    # audio callback
+    ring.read_into(outdata[:, 0])
+"""
+
+import time
+
+import numpy as np
+
+WRITE_POLL_SECONDS = 0.005  # How often a blocked writer checks for free space
+
+
+class AudioRingBuffer:
+    """Preallocated float32 ring buffer with underrun and writer-wait counters."""
+
+    def __init__(self, capacity, dtype=np.float32):
+        """
+        Args:
+            capacity: Maximum buffered samples
+            dtype: Sample type of the backing store
+        """
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=dtype)
+        self._written = 0  # Total samples written (only the writer changes it)
+        self._read = 0  # Total samples read (only the reader changes it)
+        self.underruns = 0  # Callbacks that ran out of audio mid-stream
+        self.writer_waits = 0  # Writes that waited for free space (backpressure, no data is dropped)
+        self.finished = False  # Writer is done; a short final read is not an underrun
+
+    @property
+    def available(self):
+        """Samples buffered and not yet read."""
+        return self._written - self._read
+
+    @property
+    def free(self):
+        return self.capacity - self.available
+
+    def write(self, samples, block=True):
+        """
+        Append samples, waiting for space if the buffer is full.
+
+        Returns:
+            Number of samples written (less than len(samples) only if block is False)
+        """
+        samples = np.asarray(samples, dtype=self._buffer.dtype).reshape(-1)
+        total = 0
+        waited = False
+        while total < len(samples):
+            count = min(self.free, len(samples) - total)
+            if count == 0:
+                if not block:
+                    break
+                if not waited:
+                    self.writer_waits += 1
+                    waited = True
+                time.sleep(WRITE_POLL_SECONDS)
+                continue
+
+            start = self._written % self.capacity
+            first = min(count, self.capacity - start)
+            self._buffer[start:start + first] = samples[total:total + first]
+            self._buffer[:count - first] = samples[total + first:total + count]
+            total += count
+            self._written += count  # Publish only after the data is in place
+        return total
+
+    def read_into(self, out):
+        """
+        Fill `out` (a 1D array view) from the buffer, zero-padding any shortfall.
+
+        Safe to call from the audio callback: no allocation, no locks.
+
+        Returns:
+            Number of samples read
+        """
+        count = min(len(out), self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        out[first:count] = self._buffer[:count - first]
+        out[count:] = 0
+        self._read += count
+
+        # Silence before the first write or after the end is expected
+        if count < len(out) and self._written > 0 and not self.finished:
+            self.underruns += 1
+        return count
+
+    def finish(self):
+        """Mark the end of the stream."""
+        self.finished = True
+
+    def wait_until_empty(self, poll_seconds=0.05):
+        """Block until the reader has consumed everything written."""
+        while self.available > 0:
+            time.sleep(poll_seconds)
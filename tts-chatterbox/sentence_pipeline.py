@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Producer/consumer pipeline for sentence-by-sentence synthesis.
+
+`prefetch()` synthesizes upcoming sentences on a background worker while the
+caller plays the current one. At most `depth` sentences are synthesized ahead
+of the one being played; the worker waits (backpressure) until the caller
+takes the next result.
+
+Usage:
+    for text, audio in prefetch(lambda text: synthesize(model, text), texts, depth=2):
+        play(audio)  # the next sentences are generated meanwhile
+"""
+
+import queue
+import threading
+
+PREFETCH_DEPTH = 2  # Sentences synthesized ahead of the one playing
+_DONE = object()
+
+
+def prefetch(synthesize, items, depth=PREFETCH_DEPTH):
+    """
+    Yield (item, synthesize(item)) in order, computing up to `depth` items ahead.
+
+    Args:
+        synthesize: Function called on the worker thread for each item
+        items: Iterable of inputs (e.g. sentences)
+        depth: Maximum results produced ahead of the consumer (>= 1)
+
+    Errors raised by synthesize are re-raised in the consumer.
+    """
+    results = queue.Queue()
+    slots = threading.Semaphore(max(1, depth))
+    stop = threading.Event()
+
+    def worker():
+        try:
+            for item in items:
+                # Wait for a free slot so the worker never runs too far ahead
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                results.put((item, synthesize(item)))
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            if isinstance(result, Exception):
+                raise result
+            # Taking a result frees a slot: the worker starts on the next item
+            # while the consumer plays this one
+            slots.release()
+            yield result
+    finally:
+        stop.set()
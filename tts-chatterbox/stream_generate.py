@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Incremental streaming generation for Chatterbox TTS.
+
+`model.generate()` only returns once the whole sentence has been synthesized.
+`stream_generate()` instead runs the T3 token decoder on a background thread,
+picks up each speech token as it is produced (via a forward hook on the
+speech-token embedding, which the decoder calls once per new token), and
+vocodes the tokens in small chunks with S3Gen. Each chunk is vocoded with a
+few tokens of preceding context so the seams stay smooth; the context audio
+is dropped before yielding.
+
+The model's current conditionals are used, so set the voice first
+(e.g. `VoiceConditionalsCache.use(voice_path)`).
+"""
+
+import queue
+import threading
+
+import torch
+import torch.nn.functional as F
+from chatterbox.tts import punc_norm
+
+FIRST_CHUNK_TOKENS = 10  # Speech tokens in the first chunk (~0.4s), kept small for latency
+CHUNK_TOKENS = 25  # Speech tokens per later chunk (~1s at 25 tokens/s)
+CONTEXT_TOKENS = 8  # Previous tokens re-vocoded with each chunk for smooth seams
+SPEECH_VOCAB_SIZE = 6561  # Token ids at or above this are start/stop markers
+MAX_NEW_TOKENS = 1000
+
+
+def prepare_text_tokens(model, text, cfg_weight):
+    """Normalize and tokenize text the same way ChatterboxTTS.generate does."""
+    text_tokens = model.tokenizer.text_to_tokens(punc_norm(text)).to(model.device)
+    if cfg_weight > 0.0:
+        text_tokens = torch.cat([text_tokens, text_tokens], dim=0)  # Need two seqs for CFG
+    text_tokens = F.pad(text_tokens, (1, 0), value=model.t3.hp.start_text_token)
+    text_tokens = F.pad(text_tokens, (0, 1), value=model.t3.hp.stop_text_token)
+    return text_tokens
+
+
+def vocode_tokens(model, tokens, start, context_tokens=CONTEXT_TOKENS):
+    """
+    Vocode tokens[start:] with up to context_tokens of preceding context.
+
+    Returns:
+        float32 numpy array with only the audio for tokens[start:]
+    """
+    context_start = max(0, start - context_tokens)
+    window = torch.tensor(tokens[context_start:], dtype=torch.long, device=model.device)
+    with torch.inference_mode():
+        wav, _ = model.s3gen.inference(speech_tokens=window, ref_dict=model.conds.gen)
+    wav = wav.squeeze(0).detach().cpu().numpy()
+
+    # Drop the audio that belongs to the context tokens
+    samples_per_token = len(wav) / len(window)
+    skip = int(round((start - context_start) * samples_per_token))
+    chunk = wav[skip:]
+    return model.watermarker.apply_watermark(chunk, sample_rate=model.sr)
+
+
+def stream_generate(model, text, first_chunk_tokens=FIRST_CHUNK_TOKENS, chunk_tokens=CHUNK_TOKENS,
+                    context_tokens=CONTEXT_TOKENS, repetition_penalty=1.2, min_p=0.05, top_p=1.0,
+                    cfg_weight=0.5, temperature=0.8):
+    """
+    Generate speech for text, yielding audio chunks as the tokens arrive.
+
+    Yields:
+        1D float32 numpy arrays at model.sr
+    """
+    text_tokens = prepare_text_tokens(model, text, cfg_weight)
+    token_queue = queue.Queue()
+
+    def on_speech_embed(module, inputs, output):
+        # The decoder embeds each newly sampled token on its own; prompt
+        # tokens and the start marker are embedded in larger or marker calls
+        tokens = inputs[0]
+        if tokens.numel() == 1:
+            token = int(tokens.item())
+            if token < SPEECH_VOCAB_SIZE:
+                token_queue.put(token)
+
+    def run_decoder():
+        try:
+            with torch.inference_mode():
+                model.t3.inference(
+                    t3_cond=model.conds.t3,
+                    text_tokens=text_tokens,
+                    max_new_tokens=MAX_NEW_TOKENS,
+                    temperature=temperature,
+                    cfg_weight=cfg_weight,
+                    repetition_penalty=repetition_penalty,
+                    min_p=min_p,
+                    top_p=top_p,
+                )
+        except Exception as e:
+            token_queue.put(e)
+        finally:
+            token_queue.put(None)
+
+    hook = model.t3.speech_emb.register_forward_hook(on_speech_embed)
+    decoder = threading.Thread(target=run_decoder, daemon=True)
+    decoder.start()
+
+    tokens = []
+    emitted = 0
+    target = first_chunk_tokens
+    try:
+        while True:
+            item = token_queue.get()
+            if isinstance(item, Exception):
+                raise item
+            finished = item is None
+            if not finished:
+                tokens.append(item)
+
+            pending = len(tokens) - emitted
+            if pending >= target or (finished and pending > 0):
+                yield vocode_tokens(model, tokens, emitted, context_tokens)
+                emitted = len(tokens)
+                target = chunk_tokens
+
+            if finished:
+                break
+    finally:
+        hook.remove()
+        decoder.join()
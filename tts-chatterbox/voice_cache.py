@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Voice conditioning cache for Chatterbox TTS.
+
+`model.generate(text, audio_prompt_path=...)` loads, resamples and embeds the
+reference clip on every call. This module computes the conditionals once per
+(clip, exaggeration), keeps them in memory and persists them to
+`voices/.cache/*.pt` so later runs skip the work entirely.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from chatterbox.tts import Conditionals
+
+CACHE_DIR = "voices/.cache"
+HASH_LENGTH = 16  # Hex characters of the clip hash used in cache filenames
+
+
+def hash_file(filepath, block_size=1 << 20):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class VoiceConditionalsCache:
+    """Compute Chatterbox voice conditionals once per reference clip."""
+
+    def __init__(self, model, cache_dir=CACHE_DIR, persist=True):
+        """
+        Args:
+            model: Loaded ChatterboxTTS instance
+            cache_dir: Directory for persisted `.pt` conditionals
+            persist: Save/load conditionals to/from disk (default True)
+        """
+        self.model = model
+        self.cache_dir = Path(cache_dir)
+        self.persist = persist
+        self._conds = {}
+        self._hashes = {}  # (path, mtime, size) -> content hash
+
+    def _content_hash(self, voice_path):
+        """Hash the clip, re-hashing only when its mtime or size changes."""
+        stat = os.stat(voice_path)
+        stamp = (os.path.abspath(voice_path), stat.st_mtime_ns, stat.st_size)
+        if stamp not in self._hashes:
+            self._hashes[stamp] = hash_file(voice_path)[:HASH_LENGTH]
+        return self._hashes[stamp]
+
+    def key(self, voice_path, exaggeration=0.5):
+        """Cache key: clip name + content hash + exaggeration."""
+        stem = Path(voice_path).stem
+        return f"{stem}-{self._content_hash(voice_path)}-ex{exaggeration:g}"
+
+    def get(self, voice_path, exaggeration=0.5):
+        """Return conditionals for a clip, computing them only on a cache miss."""
+        key = self.key(voice_path, exaggeration)
+        if key in self._conds:
+            return self._conds[key]
+
+        cache_file = self.cache_dir / f"{key}.pt"
+        if self.persist and cache_file.exists():
+            try:
+                conds = Conditionals.load(cache_file, map_location="cpu").to(self.model.device)
+                print(f"✓ Loaded cached voice conditionals: {cache_file}")
+                self._conds[key] = conds
+                return conds
+            except Exception as e:
+                print(f"Warning: could not load {cache_file} ({e}), recomputing")
+
+        print(f"Computing voice conditionals for {voice_path} (exaggeration={exaggeration})...")
+        self.model.prepare_conditionals(voice_path, exaggeration=exaggeration)
+        conds = self.model.conds
+        self._conds[key] = conds
+
+        if self.persist:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent renderers never read a partial file
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            conds.save(tmp_file)
+            os.replace(tmp_file, cache_file)
+            print(f"→ Saved voice conditionals to {cache_file}")
+
+        return conds
+
+    def use(self, voice_path, exaggeration=0.5):
+        """
+        Point `model.conds` at the cached conditionals for a clip.
+
+        Call `model.generate(text, exaggeration=...)` afterwards without
+        `audio_prompt_path`. A shallow copy is installed because `generate`
+        replaces `conds.t3` in place when asked for a different exaggeration.
+        """
+        conds = self.get(voice_path, exaggeration)
+        self.model.conds = Conditionals(conds.t3, conds.gen)
+        return self.model.conds
@@ -5,10 +5,16 @@ import base64
 import mimetypes
 import os
 import re
-import struct
+import sys
+from pathlib import Path
 from google import genai
 from google.genai import types
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import WavWriter
+
+OUTPUT_NAME = "ENTER_FILE_NAME"  # All streamed chunks are appended to <OUTPUT_NAME>.wav
+
 
 def save_binary_file(file_name, data):
     f = open(file_name, "wb")
@@ -110,70 +116,51 @@ Speaker 2: Deal. When we hit that level of inception, we'll both become truck dr
         ),
     )
 
+    wav_writer = None  # One growing WAV for raw PCM chunks, header patched on close
     file_index = 0
-    for chunk in client.models.generate_content_stream(
-        model=model,
-        contents=contents,
-        config=generate_content_config,
-    ):
-        if (
-            chunk.candidates is None
-            or chunk.candidates[0].content is None
-            or chunk.candidates[0].content.parts is None
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=generate_content_config,
         ):
-            continue
-        if chunk.candidates[0].content.parts[0].inline_data and chunk.candidates[0].content.parts[0].inline_data.data:
-            file_name = f"ENTER_FILE_NAME_{file_index}"
-            file_index += 1
-            inline_data = chunk.candidates[0].content.parts[0].inline_data
-            data_buffer = inline_data.data
-            file_extension = mimetypes.guess_extension(inline_data.mime_type)
-            if file_extension is None:
-                file_extension = ".wav"
-                data_buffer = convert_to_wav(inline_data.data, inline_data.mime_type)
-            save_binary_file(f"{file_name}{file_extension}", data_buffer)
-        else:
-            print(chunk.text)
-
-def convert_to_wav(audio_data: bytes, mime_type: str) -> bytes:
-    """Generates a WAV file header for the given audio data and parameters.
+            if (
+                chunk.candidates is None
+                or chunk.candidates[0].content is None
+                or chunk.candidates[0].content.parts is None
+            ):
+                continue
+            if chunk.candidates[0].content.parts[0].inline_data and chunk.candidates[0].content.parts[0].inline_data.data:
+                inline_data = chunk.candidates[0].content.parts[0].inline_data
+                file_extension = mimetypes.guess_extension(inline_data.mime_type)
+                if file_extension is None:
+                    if wav_writer is None:
+                        wav_writer = open_wav_writer(f"{OUTPUT_NAME}.wav", inline_data.mime_type)
+                    wav_writer.write(inline_data.data)
+                else:
+                    # Already a complete file format: save it as is
+                    save_binary_file(f"{OUTPUT_NAME}_{file_index}{file_extension}", inline_data.data)
+                    file_index += 1
+            else:
+                print(chunk.text)
+    finally:
+        if wav_writer is not None:
+            wav_writer.close()
+            print(f"File saved to to: {wav_writer.path}")
+
+def open_wav_writer(file_name: str, mime_type: str) -> WavWriter:
+    """Opens a WAV file that raw PCM chunks of the given MIME type are appended to.
 
     Args:
-        audio_data: The raw audio data as a bytes object.
-        mime_type: Mime type of the audio data.
+        file_name: Output WAV path.
+        mime_type: Mime type of the audio data (e.g., "audio/L16;rate=24000").
 
     Returns:
-        A bytes object representing the WAV file header.
+        A WavWriter; closing it writes the final sizes into the header.
     """
     parameters = parse_audio_mime_type(mime_type)
-    bits_per_sample = parameters["bits_per_sample"]
-    sample_rate = parameters["rate"]
-    num_channels = 1
-    data_size = len(audio_data)
-    bytes_per_sample = bits_per_sample // 8
-    block_align = num_channels * bytes_per_sample
-    byte_rate = sample_rate * block_align
-    chunk_size = 36 + data_size  # 36 bytes for header fields before data chunk size
-
-    # http://soundfile.sapp.org/doc/WaveFormat/
-
-    header = struct.pack(
-        "<4sI4s4sIHHIIHH4sI",
-        b"RIFF",          # ChunkID
-        chunk_size,       # ChunkSize (total file size - 8 bytes)
-        b"WAVE",          # Format
-        b"fmt ",          # Subchunk1ID
-        16,               # Subchunk1Size (16 for PCM)
-        1,                # AudioFormat (1 for PCM)
-        num_channels,     # NumChannels
-        sample_rate,      # SampleRate
-        byte_rate,        # ByteRate
-        block_align,      # BlockAlign
-        bits_per_sample,  # BitsPerSample
-        b"data",          # Subchunk2ID
-        data_size         # Subchunk2Size (size of audio data)
-    )
-    return header + audio_data
+    return WavWriter(file_name, parameters["rate"], num_channels=1,
+                     sample_width=parameters["bits_per_sample"] // 8)
 
 def parse_audio_mime_type(mime_type: str) -> dict[str, int | None]:
     """Parses bits per sample and rate from an audio MIME type string.
@@ -3,6 +3,13 @@
 TTS script to read markdown files aloud using Google Gemini TTS API.
 Usage: python tts_reader.py <markdown_file>
 Requires GEMINI_API_KEY environment variable to be set.
+
+Documents longer than CHUNK_MAX_TOKENS are split on paragraph/sentence
+boundaries, the chunks are synthesized in parallel (CHUNK_WORKERS, paced to
+REQUESTS_PER_MINUTE) and their audio is written to one WAV in order.
+
+With --stream, audio is requested with generate_content_stream and appended to
+the WAV as it arrives; --play also plays it while it is being generated.
 """
 
 import sys
@@ -10,8 +17,14 @@ import os
 import re
 import tempfile
 import subprocess
-import wave
 import base64
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 try:
@@ -22,6 +35,33 @@ except ImportError:
     print("Install with: pip install -q -U google-genai")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import SynthesisCache, WavWriter, write_wav
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+# Gemini TTS audio format
+SAMPLE_RATE = 24000
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+# Chunked mode for long documents
+CHUNK_MAX_TOKENS = 1000  # Text budget per request (~4 min of speech)
+CHARS_PER_TOKEN = 4  # Rough estimate for English text
+CHUNK_WORKERS = 4  # Chunks synthesized concurrently
+REQUESTS_PER_MINUTE = 10  # Request pacing shared by all workers
+CHUNK_GAP_SECONDS = 0.3  # Pause inserted between chunks
+VOICE_SAMPLE_WORKERS = 5  # Voice samples generated concurrently (--voices)
+MAX_RETRIES = 5  # Retries of a rate-limited (429) request
+RETRY_BASE_SECONDS = 5.0  # Backoff doubles per retry
+
+# Shared HTTP connection pool (one client for the whole process)
+HTTP_MAX_CONNECTIONS = 16
+HTTP_KEEPALIVE_SECONDS = 60
+
+# Audio for unchanged text is reused across runs
+synthesis_cache = SynthesisCache()
+
 def clean_markdown_for_tts(text):
     """Remove markdown formatting and make text more TTS-friendly."""
     # Remove markdown headers
@@ -48,8 +88,99 @@ def clean_markdown_for_tts(text):
     
     return text
 
+def split_text_into_chunks(text, max_chars=CHUNK_MAX_TOKENS * CHARS_PER_TOKEN):
+    """
+    Split text into chunks of at most max_chars, breaking between paragraphs
+    where possible, then between sentences, then between words.
+    """
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(' ', 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                pieces.append((sentence[:cut], " "))
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                pieces.append((sentence, " "))
+        # The paragraph's last sentence is followed by a paragraph break
+        pieces[-1] = (pieces[-1][0], "\n\n")
+
+    chunks = []
+    current = ""
+    separator = ""
+    for piece, next_separator in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = current + separator + piece if current else piece
+        separator = next_separator
+    if current:
+        chunks.append(current)
+    return chunks
+
+class RequestPacer:
+    """Spaces request starts evenly across threads, with a shared pause after rate limiting."""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Claim the next request slot; returns the seconds until it starts."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        return max(0.0, start - now)
+
+    def wait(self):
+        """Block until this caller's request slot."""
+        time.sleep(self._reserve())
+
+    async def wait_async(self):
+        """Async wait() for coroutines sharing the pacer."""
+        await asyncio.sleep(self._reserve())
+
+    def back_off(self, seconds):
+        """Hold every request for `seconds`."""
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+def is_rate_limited(error):
+    """True for Gemini 429 / RESOURCE_EXHAUSTED errors."""
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+def call_with_retries(request, pacer=None):
+    """Run request(), pacing it and retrying rate-limited attempts with exponential backoff."""
+    attempt = 0
+    while True:
+        if pacer is not None:
+            pacer.wait()
+        try:
+            return request()
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_rate_limited(e):
+                raise
+            delay = RETRY_BASE_SECONDS * 2 ** attempt
+            attempt += 1
+            print(f"Rate limited, retrying in {delay:.0f}s (attempt {attempt}/{MAX_RETRIES})")
+            if pacer is not None:
+                pacer.back_off(delay)
+            else:
+                time.sleep(delay)
+
+@lru_cache(maxsize=None)
 def load_api_key():
-    """Load API key from secrets/gemini.api_key file or environment variable."""
+    """Load API key from secrets/gemini.api_key file or environment variable (read once)."""
     # Try loading from file first
     secrets_path = Path("secrets/gemini.api_key")
     if secrets_path.exists():
@@ -74,59 +205,138 @@ def load_api_key():
     print("Get your API key from: https://aistudio.google.com/app/apikey")
     sys.exit(1)
 
-def generate_speech_with_gemini(text, voice_name="Kore"):
-    """Generate speech from text using Google Gemini TTS API."""
-    api_key = load_api_key()
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    The process-wide Gemini client.
+
+    Its sync and async HTTP clients keep connections alive in a shared pool, so
+    repeated requests skip client setup and TLS handshakes.
+    """
+    with _client_lock:  # Chunk workers may ask for it at the same time
+        return _create_client()
+
+@lru_cache(maxsize=None)
+def _create_client():
+    import httpx  # Installed with google-genai
+
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+    )
+    return genai.Client(
+        api_key=load_api_key(),
+        http_options=types.HttpOptions(
+            client_args={"limits": limits},
+            async_client_args={"limits": limits},
+        ),
+    )
+
+def speech_config(voice_name):
+    """Request config for single-voice audio output."""
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                    voice_name=voice_name,
+                )
+            )
+        ),
+    )
+
+def response_pcm(response):
+    """Raw PCM bytes from a generate_content response."""
+    audio_data = response.candidates[0].content.parts[0].inline_data.data
+    if isinstance(audio_data, str):
+        audio_data = base64.b64decode(audio_data)
+    return audio_data
+
+def generate_speech_with_gemini(text, voice_name="Kore", pacer=None):
+    """Generate speech from text using Google Gemini TTS API. Returns raw PCM bytes."""
+    cache_key = synthesis_cache.key("gemini", TTS_MODEL, voice_name, text)
+    cached_pcm = synthesis_cache.get_bytes(cache_key)
+    if cached_pcm is not None:
+        print(f"Using cached speech (voice: {voice_name})")
+        return cached_pcm
     
     try:
-        client = genai.Client(api_key=api_key)
+        client = get_client()
         
         print(f"Generating speech with Gemini TTS (voice: {voice_name})...")
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
+        response = call_with_retries(lambda: client.models.generate_content(
+            model=TTS_MODEL,
             contents=text,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=voice_name,
-                        )
-                    )
-                ),
-            )
-        )
+            config=speech_config(voice_name)
+        ), pacer)
         
-        # Get the audio data from the response
-        audio_data = response.candidates[0].content.parts[0].inline_data.data
+        audio_data = response_pcm(response)
+        synthesis_cache.put_bytes(cache_key, audio_data)
         return audio_data
         
     except Exception as e:
         print(f"Error generating speech: {e}")
         sys.exit(1)
 
+async def generate_speech_async(text, voice_name="Kore", pacer=None):
+    """
+    Async variant of generate_speech_with_gemini on the shared client's pool.
+
+    Errors are raised instead of exiting, so one failed request among many
+    concurrent ones can be handled by the caller.
+
+    Returns:
+        (raw PCM bytes, True if the audio came from the synthesis cache)
+    """
+    cache_key = synthesis_cache.key("gemini", TTS_MODEL, voice_name, text)
+    cached_pcm = synthesis_cache.get_bytes(cache_key)
+    if cached_pcm is not None:
+        return cached_pcm, True
+    
+    print(f"→ Generating speech with Gemini TTS (voice: {voice_name})...")
+    audio_data = await request_speech_async(text, voice_name, pacer)
+    synthesis_cache.put_bytes(cache_key, audio_data)
+    return audio_data, False
+
+async def request_speech_async(text, voice_name="Kore", pacer=None):
+    """One uncached async TTS request with 429 backoff (used by generate_speech_async). Returns raw PCM bytes."""
+    client = get_client()
+    for attempt in range(MAX_RETRIES + 1):
+        if pacer is not None:
+            await pacer.wait_async()
+        try:
+            response = await client.aio.models.generate_content(
+                model=TTS_MODEL,
+                contents=text,
+                config=speech_config(voice_name)
+            )
+            break
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_rate_limited(e):
+                raise
+            delay = RETRY_BASE_SECONDS * 2 ** attempt
+            print(f"Rate limited ({voice_name}), retrying in {delay:.0f}s")
+            if pacer is not None:
+                pacer.back_off(delay)
+            else:
+                await asyncio.sleep(delay)
+    
+    return response_pcm(response)
+
 def save_audio_data(audio_data, output_file):
     """Save audio data to a WAV file with proper formatting."""
     try:
-        # Gemini TTS returns base64-encoded PCM data
-        # Decode the base64 data
+        # PCM from response_pcm is already decoded; only base64 text needs decoding
         if isinstance(audio_data, str):
             pcm_data = base64.b64decode(audio_data)
         else:
             pcm_data = audio_data
         
-        # Gemini TTS audio specifications
-        sample_rate = 24000
-        channels = 1
-        sample_width = 2  # 16-bit = 2 bytes
-        
-        # Create WAV file with proper header
-        with wave.open(output_file, 'wb') as wav_file:
-            wav_file.setnchannels(channels)
-            wav_file.setsampwidth(sample_width)
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(pcm_data)
+        # Header and PCM go out in one writev, without building header + data
+        write_wav(output_file, pcm_data, SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH)
         
         print(f"Audio saved to: {output_file}")
         
@@ -135,8 +345,152 @@ def save_audio_data(audio_data, output_file):
         print(f"Audio data type: {type(audio_data)}")
         sys.exit(1)
 
-def read_file_with_tts(filename, voice_name="Kore", output_file=None):
-    """Read a markdown file and convert it to speech using Gemini TTS API."""
+def synthesize_chunks_to_wav(chunks, voice_name, output_file, workers=CHUNK_WORKERS,
+                             requests_per_minute=REQUESTS_PER_MINUTE):
+    """
+    Synthesize text chunks in parallel and write their audio to one WAV, in order.
+
+    Args:
+        chunks: Text chunks in reading order
+        voice_name: Gemini voice
+        output_file: Output WAV path
+        workers: Chunks synthesized concurrently
+        requests_per_minute: Pacing shared by all workers
+    """
+    pacer = RequestPacer(requests_per_minute)
+    gap = bytes(int(CHUNK_GAP_SECONDS * SAMPLE_RATE) * CHANNELS * SAMPLE_WIDTH)
+
+    def synthesize(item):
+        i, chunk = item
+        print(f"→ Chunk {i+1}/{len(chunks)} ({len(chunk)} chars)")
+        return generate_speech_with_gemini(chunk, voice_name, pacer)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            WavWriter(output_file, SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH) as writer:
+        # map yields in order, so each chunk is written as soon as its predecessors are
+        for i, pcm in enumerate(pool.map(synthesize, enumerate(chunks))):
+            writer.write_many([gap, pcm] if i > 0 else [pcm])
+            print(f"✓ Chunk {i+1}/{len(chunks)} written ({writer.frames_written / SAMPLE_RATE:.1f}s total)")
+
+    print(f"Audio saved to: {output_file}")
+
+class PcmPlayer:
+    """Plays PCM on the default output device from a background thread, so writes never block."""
+
+    def __init__(self):
+        try:
+            import sounddevice as sd
+        except ImportError:
+            print("Error: playback needs sounddevice (pip install sounddevice)")
+            sys.exit(1)
+        self._queue = queue.Queue()
+        self._stream = sd.RawOutputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype=f"int{SAMPLE_WIDTH * 8}")
+        self._stream.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while (data := self._queue.get()) is not None:
+            self._stream.write(data)
+
+    def play(self, pcm):
+        self._queue.put(pcm)
+
+    def close(self):
+        """Wait for queued audio to finish playing."""
+        self._queue.put(None)
+        self._thread.join()
+        self._stream.stop()
+        self._stream.close()
+
+def stream_pcm(text, voice_name):
+    """Yield raw PCM pieces from generate_content_stream as they arrive."""
+    client = get_client()
+
+    def open_stream():
+        # Rate-limit errors surface on the first read, so take it inside the retry
+        stream = client.models.generate_content_stream(
+            model=TTS_MODEL,
+            contents=text,
+            config=speech_config(voice_name)
+        )
+        return next(stream, None), stream
+
+    first, stream = call_with_retries(open_stream)
+    if first is None:
+        return
+    for response in itertools.chain([first], stream):
+        if not response.candidates or response.candidates[0].content is None:
+            continue
+        for part in response.candidates[0].content.parts or []:
+            if part.inline_data and part.inline_data.data:
+                data = part.inline_data.data
+                yield base64.b64decode(data) if isinstance(data, str) else data
+
+def stream_chunks_to_wav(chunks, voice_name, output_file, play=False):
+    """
+    Stream each chunk's audio into one growing WAV as it arrives, optionally playing it.
+
+    Chunks are requested one after another; playback runs on its own thread,
+    so the next chunk is already generating while the current one plays.
+
+    Args:
+        chunks: Text chunks in reading order
+        voice_name: Gemini voice
+        output_file: Output WAV path (header sizes are patched on close)
+        play: Also play the audio on the default output device
+    """
+    player = PcmPlayer() if play else None
+    frame_size = SAMPLE_WIDTH * CHANNELS
+    gap = bytes(int(CHUNK_GAP_SECONDS * SAMPLE_RATE) * frame_size)
+    started = time.perf_counter()
+    first_audio = None
+
+    try:
+        with WavWriter(output_file, SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH) as writer:
+            for i, chunk in enumerate(chunks):
+                print(f"→ Chunk {i+1}/{len(chunks)} ({len(chunk)} chars)")
+                cache_key = synthesis_cache.key("gemini", TTS_MODEL, voice_name, chunk)
+                cached_pcm = synthesis_cache.get_bytes(cache_key)
+                pieces = [cached_pcm] if cached_pcm is not None else stream_pcm(chunk, voice_name)
+
+                received = []
+                carry = b""
+                if i > 0:
+                    pieces = itertools.chain([gap], pieces)
+                for piece in pieces:
+                    # Only hand whole frames to the file and the device
+                    data = carry + piece if carry else piece
+                    whole = len(data) - len(data) % frame_size
+                    data, carry = data[:whole], data[whole:]
+                    if not data:
+                        continue
+                    if first_audio is None:
+                        first_audio = time.perf_counter() - started
+                        print(f"✓ First audio after {first_audio:.2f}s")
+                    writer.write(data)
+                    if player is not None:
+                        player.play(data)
+                    if piece is not gap:
+                        received.append(data)
+
+                if cached_pcm is None:
+                    synthesis_cache.put_bytes(cache_key, b"".join(received) + carry)
+                print(f"✓ Chunk {i+1}/{len(chunks)} written ({writer.frames_written / SAMPLE_RATE:.1f}s total)")
+    finally:
+        if player is not None:
+            player.close()
+
+    print(f"Audio saved to: {output_file}")
+
+def read_file_with_tts(filename, voice_name="Kore", output_file=None, stream=False, play=False):
+    """
+    Read a markdown file and convert it to speech using Gemini TTS API.
+
+    Text longer than CHUNK_MAX_TOKENS is synthesized in parallel chunks. With
+    stream (or play) the chunks are streamed in order into the output file
+    instead, and play also sends the audio to the default output device.
+    """
     try:
         with open(filename, 'r', encoding='utf-8') as file:
             content = file.read()
@@ -144,22 +498,27 @@ def read_file_with_tts(filename, voice_name="Kore", output_file=None):
         # Clean the content for TTS
         clean_content = clean_markdown_for_tts(content)
         
-        # Check if content is too long (Gemini has token limits)
-        if len(clean_content) > 30000:  # Conservative limit
-            print("Warning: Content is very long. Consider splitting into smaller sections.")
-        
-        print(f"Converting {filename} to speech...")
-        
-        # Generate speech using Gemini TTS
-        audio_data = generate_speech_with_gemini(clean_content, voice_name)
-        
         # Generate output filename if not provided
         if not output_file:
             input_path = Path(filename)
             output_file = input_path.with_suffix('.wav').name
         
-        # Save the generated audio
-        save_audio_data(audio_data, output_file)
+        print(f"Converting {filename} to speech...")
+        
+        # Long documents exceed Gemini's per-request limits: split and render in parallel
+        chunks = split_text_into_chunks(clean_content)
+        if stream or play:
+            stream_chunks_to_wav(chunks, voice_name, output_file, play)
+        elif len(chunks) > 1:
+            print(f"Splitting {len(clean_content)} chars into {len(chunks)} chunks")
+            synthesize_chunks_to_wav(chunks, voice_name, output_file)
+        else:
+            # Generate speech using Gemini TTS
+            audio_data = generate_speech_with_gemini(clean_content, voice_name)
+            
+            # Save the generated audio
+            save_audio_data(audio_data, output_file)
+        synthesis_cache.print_stats()
         
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
@@ -171,6 +530,41 @@ def read_file_with_tts(filename, voice_name="Kore", output_file=None):
         print(f"Error: {e}")
         sys.exit(1)
 
+async def generate_samples_concurrently(voices, text, workers=VOICE_SAMPLE_WORKERS,
+                                        requests_per_minute=REQUESTS_PER_MINUTE):
+    """
+    Generate and save one sample per voice, at most `workers` at a time.
+
+    Returns:
+        {voice: (status, seconds taken, audio seconds)} with status "cached", "generated" or "failed"
+    """
+    pacer = RequestPacer(requests_per_minute)
+    slots = asyncio.Semaphore(workers)
+    results = {}
+
+    async def generate(voice):
+        async with slots:
+            output_file = f"voice_sample_{voice.lower()}.wav"
+            started = time.perf_counter()
+            try:
+                audio_data, cached = await generate_speech_async(text, voice, pacer)
+            except Exception as e:
+                results[voice] = ("failed", time.perf_counter() - started, 0.0)
+                print(f"Error generating sample for {voice}: {e}")
+                return
+            save_audio_data(audio_data, output_file)
+            results[voice] = ("cached" if cached else "generated", time.perf_counter() - started,
+                              len(audio_data) / (SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH))
+
+    await asyncio.gather(*(generate(voice) for voice in voices))
+    return {voice: results[voice] for voice in voices}
+
+def print_sample_timings(results):
+    """Print a per-voice timing table."""
+    print(f"\n{'Voice':<10} {'Status':<10} {'Time':>7} {'Audio':>7}")
+    for voice, (status, seconds, audio_seconds) in results.items():
+        print(f"{voice:<10} {status:<10} {seconds:>6.1f}s {audio_seconds:>6.1f}s")
+
 def generate_voice_samples():
     """Generate test audio samples for all available voices."""
     # Available Gemini TTS voices
@@ -191,25 +585,14 @@ def generate_voice_samples():
     The metamaterial cables were revolutionary in theory, but in practice, they kept developing 
     micro-fractures at resonance points that shouldn't exist. This was supposed to be her masterpiece."""
     
-    print("Generating voice samples...")
+    print(f"Generating voice samples ({VOICE_SAMPLE_WORKERS} at a time)...")
     print(f"Test text: {test_text[:50]}...")
     
-    for voice in voices:
-        try:
-            print(f"\nGenerating sample for {voice} voice...")
-            output_file = f"voice_sample_{voice.lower()}.wav"
-            
-            # Generate speech using Gemini TTS
-            audio_data = generate_speech_with_gemini(test_text, voice)
-            
-            # Save the generated audio
-            save_audio_data(audio_data, output_file)
-            
-        except Exception as e:
-            print(f"Error generating sample for {voice}: {e}")
-            continue
+    results = asyncio.run(generate_samples_concurrently(voices, test_text))
+    print_sample_timings(results)
     
     print("\nVoice samples generation complete!")
+    synthesis_cache.print_stats()
     print("Files generated:")
     for voice in voices:
         sample_file = f"voice_sample_{voice.lower()}.wav"
@@ -224,14 +607,19 @@ def main():
         generate_voice_samples()
         return
     
-    if len(sys.argv) < 2 or len(sys.argv) > 4:
-        print("Usage: python tts_reader.py <markdown_file> [voice_name] [output_file]")
+    play = "--play" in sys.argv
+    stream = play or "--stream" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ("--stream", "--play")]
+    
+    if len(args) < 1 or len(args) > 3:
+        print("Usage: python tts_reader.py [--stream | --play] <markdown_file> [voice_name] [output_file]")
         print("       python tts_reader.py --voices  (generate voice samples)")
         print()
         print("Examples:")
         print("  python tts_reader.py chapter-01-opening.md")
         print("  python tts_reader.py chapter-01-opening.md Puck")
         print("  python tts_reader.py chapter-01-opening.md Kore chapter-01.wav")
+        print("  python tts_reader.py --play chapter-01-opening.md  (hear it while it is generated)")
         print("  python tts_reader.py --voices")
         print()
         print("Available voices: Kore, Puck, Charon, Zephyr, Aoede, Fenrir, Bellona, Coral, Helios, Neptune")
@@ -239,11 +627,11 @@ def main():
         print("API key loaded from secrets/gemini.api_key or GEMINI_API_KEY env var.")
         sys.exit(1)
     
-    filename = sys.argv[1]
-    voice_name = sys.argv[2] if len(sys.argv) >= 3 else "Kore"
-    output_file = sys.argv[3] if len(sys.argv) == 4 else None
+    filename = args[0]
+    voice_name = args[1] if len(args) >= 2 else "Kore"
+    output_file = args[2] if len(args) == 3 else None
     
-    read_file_with_tts(filename, voice_name, output_file)
+    read_file_with_tts(filename, voice_name, output_file, stream, play)
 
 if __name__ == "__main__":
     main()
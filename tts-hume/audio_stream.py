@@ -0,0 +1,98 @@
+"""
+Write streamed Hume TTS audio straight to disk.
+
+`synthesize_json_streaming` returns the audio as a sequence of small base64
+chunks tagged with their utterance index. Each chunk is decoded on its own
+and appended to that utterance's file, so only one chunk is ever held in
+memory and the first bytes reach disk as soon as they arrive.
+
+WAV chunks that carry their own header have it stripped, and the header of
+the output file is rewritten with the real sizes once the stream ends. Files
+are written under a temporary name and renamed when complete.
+
+Usage:
+    chunks = hume.tts.synthesize_json_streaming(utterances=[...], context=context)
+    generation_id = await stream_utterances_to_files(chunks, [path_1, path_2])
+"""
+
+import base64
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import WavWriter, parse_wav_header
+
+
+class StreamingAudioFile:
+    """One output file assembled from streamed audio chunks."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._wav = None  # WavWriter when the stream is WAV
+        self._raw = None  # Plain file for other formats (e.g. MP3 frames append as-is)
+
+    def write_chunk(self, data: bytes) -> None:
+        if self._wav is None and self._raw is None:
+            if data[:4] == b"RIFF":
+                sample_rate, num_channels, sample_width, float_samples, offset = parse_wav_header(data)
+                self._wav = WavWriter(self.tmp_path, sample_rate, num_channels, sample_width, float_samples)
+                data = memoryview(data)[offset:]
+            else:
+                self._raw = open(self.tmp_path, "wb")
+        elif self._wav is not None and data[:4] == b"RIFF":
+            # Later chunk with its own header: keep only the samples
+            data = memoryview(data)[parse_wav_header(data)[4]:]
+
+        if self._wav is not None:
+            self._wav.write(data)
+        else:
+            self._raw.write(data)
+
+    def close(self) -> None:
+        """Finish the file (fsync'd) and move it into place."""
+        if self._wav is not None:
+            self._wav.close(fsync=True)
+        elif self._raw is not None:
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            self._raw.close()
+        else:
+            raise ValueError(f"No audio received for {self.path.name}")
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Drop a partially written file."""
+        for f in (self._wav, self._raw):
+            if f is not None:
+                f.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+async def stream_utterances_to_files(chunks, file_paths: List[Path]) -> Optional[str]:
+    """
+    Write streamed chunks to one file per utterance.
+
+    Args:
+        chunks: Async iterator from hume.tts.synthesize_json_streaming
+        file_paths: Output path for each utterance, in request order
+
+    Returns:
+        The generation_id reported by the stream
+    """
+    files = [StreamingAudioFile(path) for path in file_paths]
+    generation_id = None
+    try:
+        async for chunk in chunks:
+            generation_id = getattr(chunk, "generation_id", None) or generation_id
+            index = getattr(chunk, "utterance_index", None) or 0
+            files[index].write_chunk(base64.b64decode(chunk.audio))
+        for f in files:
+            f.close()
+    except BaseException:
+        for f in files:
+            f.abort()
+        raise
+    return generation_id
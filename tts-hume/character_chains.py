@@ -0,0 +1,43 @@
+"""
+Per-character dependency chains for Hume script rendering.
+
+With voice continuity on, each line is generated with the previous line of the
+same character as context (its generation_id), so a line depends only on that
+character's previous line. The script therefore splits into one chain per
+character: lines within a chain run in order, the chains run in parallel.
+
+Usage:
+    chains = build_character_chains(enumerate(script_lines))
+    await run_chains(chains, process_chain)  # process_chain(chain) handles lines in order
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+Chain = List[Tuple[int, Dict[str, Any]]]
+
+
+def build_character_chains(
+    indexed_lines: Iterable[Tuple[int, Dict[str, Any]]],
+    maintain_character_continuity: bool = True
+) -> List[Chain]:
+    """
+    Group script lines into dependency chains.
+
+    Args:
+        indexed_lines: (index, line) pairs in script order
+        maintain_character_continuity: If False every line is independent
+
+    Returns:
+        Chains of (index, line), longest first so the critical path starts early
+    """
+    chains: Dict[Any, Chain] = {}
+    for index, line in indexed_lines:
+        key = line.get("character", "UNKNOWN") if maintain_character_continuity else index
+        chains.setdefault(key, []).append((index, line))
+    return sorted(chains.values(), key=len, reverse=True)
+
+
+async def run_chains(chains: List[Chain], process_chain: Callable[[Chain], Awaitable[None]]) -> None:
+    """Run every chain concurrently; process_chain handles one chain's lines in order."""
+    await asyncio.gather(*(process_chain(chain) for chain in chains))
@@ -0,0 +1,207 @@
+"""
+Render script lines with Hume TTS for process_audio.py and resume.py.
+
+A LineRenderer turns script lines into jobs, restores unchanged lines from the
+synthesis cache and sends the rest as (optionally batched) requests, keeping
+each character's latest generation_id for voice continuity. Each character's
+chain is processed in order; see character_chains.py for running chains in
+parallel.
+
+Usage:
+    renderer = LineRenderer(hume, output_dir, synthesis_cache, limiter, get_voice_for_character)
+    await run_chains(chains, renderer.process_chain)
+"""
+
+import base64
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import aiofiles
+from hume.tts import PostedContextWithGenerationId, PostedUtterance
+
+from audio_stream import stream_utterances_to_files
+from rate_limiter import RateLimiter, call_with_backoff
+from utterance_batches import MAX_BATCH_CHARS, MAX_BATCH_UTTERANCES, fits_batch, split_utterance_audio
+
+Job = Dict[str, Any]
+
+
+async def write_audio_to_file(base64_encoded_audio: str, output_dir: Path, filename: str) -> Path:
+    """
+    Write base64 encoded audio to a WAV file.
+
+    The audio goes to a temporary file that is fsync'd and renamed into place,
+    so an interrupted write never leaves a truncated WAV behind.
+    """
+    file_path = output_dir / f"{filename}.wav"
+    tmp_path = output_dir / f"{filename}.wav.tmp"
+    audio_data = base64.b64decode(base64_encoded_audio)
+    async with aiofiles.open(tmp_path, "wb") as f:
+        await f.write(audio_data)
+        await f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    print(f"Wrote {file_path}")
+    return file_path
+
+
+class LineRenderer:
+    """Generates script lines into `<output_dir>/<index>_<character>.wav` files."""
+
+    def __init__(
+        self,
+        hume,
+        output_dir: Path,
+        synthesis_cache,
+        limiter: RateLimiter,
+        voice_for_character: Callable[[str], str],
+        character_last_gen: Optional[Dict[str, str]] = None,
+        maintain_character_continuity: bool = True,
+        stream_audio: bool = True,
+        index_width: int = 3,
+        batch_utterances: int = MAX_BATCH_UTTERANCES,
+        batch_chars: int = MAX_BATCH_CHARS,
+        on_line_done: Optional[Callable[[Job, Optional[str], Path], None]] = None
+    ):
+        """
+        Args:
+            hume: AsyncHumeClient
+            output_dir: Directory the line files are written to
+            synthesis_cache: SynthesisCache used to reuse unchanged lines
+            limiter: Rate limiter shared by every request
+            voice_for_character: Maps a character name to a Hume voice name
+            character_last_gen: Starting generation_id per character (continuity)
+            maintain_character_continuity: Send each character's previous generation as context
+            stream_audio: Write audio chunk by chunk as it arrives
+            index_width: Zero-padding of line indices in filenames
+            batch_utterances: Lines packed into one request (1 = no batching)
+            batch_chars: Maximum utterance text per batched request
+            on_line_done: Called with (job, generation_id, file_path) for every finished line
+        """
+        self.hume = hume
+        self.output_dir = Path(output_dir)
+        self.synthesis_cache = synthesis_cache
+        self.limiter = limiter
+        self.voice_for_character = voice_for_character
+        self.character_last_gen = dict(character_last_gen or {})
+        self.maintain_character_continuity = maintain_character_continuity
+        self.stream_audio = stream_audio
+        self.index_width = index_width
+        self.batch_utterances = batch_utterances
+        self.batch_chars = batch_chars
+        self.on_line_done = on_line_done
+
+    def prepare_line(self, index: int, line: Dict[str, Any]) -> Job:
+        """Everything needed to generate or restore one script line."""
+        character = line.get("character", "UNKNOWN")
+        utterance = line.get("utterance", "")
+        voice_direction = line.get("voiceDirection", "")
+        voice_name = self.voice_for_character(character)
+
+        # Filtered scripts (resume.py) keep the line's position in the full script
+        index = line.get("originalIndex", index)
+        filename = f"{index:0{self.index_width}d}_{character.lower().replace(' ', '_')}"
+
+        # Reuse audio for lines whose text, voice and direction haven't changed.
+        # The continuity context is left out of the key so one edited line
+        # doesn't invalidate every later line for that character.
+        cache_key = self.synthesis_cache.key(
+            "hume", "hume-tts", voice_name, utterance,
+            {"description": voice_direction, "continuity": bool(self.maintain_character_continuity)}
+        )
+        return {
+            "index": index,
+            "line": line,
+            "character": character,
+            "utterance": utterance,
+            "voice_direction": voice_direction,
+            "voice_name": voice_name,
+            "filename": filename,
+            "file_path": self.output_dir / f"{filename}.wav",
+            "cache_key": cache_key
+        }
+
+    async def synthesize_batch(self, batch: List[Job]) -> None:
+        """Send one request for a batch of consecutive lines of one chain."""
+        character = batch[0]["character"]
+        if len(batch) == 1:
+            print(f"Generating audio for {character}: '{batch[0]['utterance'][:30]}...'")
+        else:
+            print(f"Generating audio for {len(batch)} lines of {character} in one request")
+
+        # Prepare context if we have previous generations for this character
+        context = None
+        if self.maintain_character_continuity and character in self.character_last_gen:
+            context = PostedContextWithGenerationId(
+                generation_id=self.character_last_gen[character]
+            )
+
+        utterances = [
+            PostedUtterance(
+                voice={ "name": job["voice_name"], "provider": "HUME_AI" },
+                description=job["voice_direction"],
+                text=job["utterance"],
+            )
+            for job in batch
+        ]
+        file_paths = [job["file_path"] for job in batch]
+
+        if self.stream_audio:
+            # Stream chunks straight into the per-line files (rate limited, retried on 429)
+            generation_id = await call_with_backoff(self.limiter, lambda: stream_utterances_to_files(
+                self.hume.tts.synthesize_json_streaming(utterances=utterances, context=context),
+                file_paths
+            ))
+            for file_path in file_paths:
+                print(f"Wrote {file_path}")
+        else:
+            # Call Hume TTS API (rate limited, retried on 429)
+            response = await call_with_backoff(self.limiter, lambda: self.hume.tts.synthesize_json(
+                utterances=utterances,
+                context=context,
+                num_generations=1
+            ))
+            generation = response.generations[0]
+            generation_id = generation.generation_id
+            for job, audio in zip(batch, split_utterance_audio(generation, len(batch))):
+                await write_audio_to_file(audio, self.output_dir, job["filename"])
+
+        # Store the generation_id for future utterances from this character
+        self.character_last_gen[character] = generation_id
+
+        # Keep each finished line in the cache
+        for job in batch:
+            self.synthesis_cache.store(job["cache_key"], job["file_path"], meta={"generation_id": generation_id})
+            self._line_done(job, generation_id)
+
+    async def process_chain(self, chain) -> None:
+        """Generate a chain's lines in order, packing consecutive uncached lines into batches."""
+        batch: List[Job] = []
+        for index, line in chain:
+            job = self.prepare_line(index, line)
+
+            if self.synthesis_cache.fetch(job["cache_key"], job["file_path"]):
+                # Lines before this one must be generated first to keep the context order
+                if batch:
+                    await self.synthesize_batch(batch)
+                    batch = []
+                cached = self.synthesis_cache.get_meta(job["cache_key"]) or {}
+                if cached.get("generation_id"):
+                    self.character_last_gen[job["character"]] = cached["generation_id"]
+                self._line_done(job, cached.get("generation_id"))
+                print(f"Restored {job['filename']}.wav from cache")
+                continue
+
+            if batch and not fits_batch([b["utterance"] for b in batch], job["utterance"],
+                                        self.batch_utterances, self.batch_chars):
+                await self.synthesize_batch(batch)
+                batch = []
+            batch.append(job)
+
+        if batch:
+            await self.synthesize_batch(batch)
+
+    def _line_done(self, job: Job, generation_id: Optional[str]) -> None:
+        if self.on_line_done is not None:
+            self.on_line_done(job, generation_id, job["file_path"])
@@ -0,0 +1,91 @@
+"""
+Sidecar cache of per-clip loudness measurements for merge_audio_files.py.
+
+Measuring loudness is the slow part of a merge, and it only depends on the
+clip's audio and the trim settings, not on target_level or buffer_duration.
+Measurements are stored in `<input folder>/.loudness_cache.json` keyed by a
+sha256 of the file contents plus those settings, so re-merging unchanged clips
+skips measurement entirely.
+
+Usage:
+    cache = LoudnessCache(input_folder)
+    key = cache.key(audio_file, {"engine": "ffmpeg", "threshold": "-50dB"})
+    info = cache.get(key)
+    if info is None:
+        info = measure(audio_file)
+        cache.put(key, info)
+    cache.save()
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+CACHE_FILE = ".loudness_cache.json"
+
+
+def file_digest(path) -> str:
+    """sha256 of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class LoudnessCache:
+    """Loudness measurements for one folder of clips."""
+
+    def __init__(self, folder, enabled=True):
+        self.path = Path(folder) / CACHE_FILE
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._used = set()
+        self._lock = threading.Lock()  # Clips are measured from worker threads
+        if enabled:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (json.JSONDecodeError, OSError):
+                print(f"Warning: ignoring unreadable loudness cache {self.path}")
+
+    @staticmethod
+    def key(audio_file, settings) -> str:
+        """Cache key for a clip's contents measured with the given settings."""
+        payload = json.dumps(settings, sort_keys=True, default=str)
+        return f"{file_digest(audio_file)}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, key):
+        """Cached measurement, or None."""
+        with self._lock:
+            info = self._entries.get(key) if self.enabled else None
+            if info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._used.add(key)
+            return info
+
+    def put(self, key, info) -> None:
+        if not self.enabled or info is None:
+            return
+        with self._lock:
+            self._entries[key] = info
+            self._used.add(key)
+
+    def save(self) -> None:
+        """Write the entries used this run (stale clips drop out) atomically."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = {key: self._entries[key] for key in sorted(self._used)}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def print_stats(self) -> None:
+        print(f"Loudness cache: {self.hits} hits, {self.misses} measured [{self.path}]")
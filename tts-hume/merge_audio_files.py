@@ -1,16 +1,238 @@
+import math
 import os
 import sys
 import subprocess
 from pathlib import Path
 import tempfile
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loudness_cache import LoudnessCache
+
+SAMPLE_RATE = 44100
+ENGINE = "ffmpeg"  # "ffmpeg": filter graphs; "numpy": trim/normalize in-process (tts_common.loudness, needs NumPy)
+SINGLE_PASS = True  # ffmpeg engine: one fused trim+measure pass per file, then a single merge graph
+TRUE_PEAK_DB = -1.5
+CACHE_MEASUREMENTS = True  # Reuse loudness measurements of unchanged clips (.loudness_cache.json)
+MAX_FILTER_ARG_CHARS = 100_000  # Longer filter graphs are passed to ffmpeg in a file
+
+def trim_filter(silence_threshold, min_silence_duration):
+    """ffmpeg filter chain that trims leading and trailing silence."""
+    return (f"silenceremove=start_periods=1:start_threshold={silence_threshold}:"
+            f"start_silence={min_silence_duration}:detection=peak,"
+            f"areverse,silenceremove=start_periods=1:start_threshold={silence_threshold}:"
+            f"start_silence={min_silence_duration}:detection=peak,areverse")
+
+def parse_loudnorm_json(stderr):
+    """Extract loudnorm's measurement JSON from ffmpeg's stderr, or None."""
+    json_start = stderr.rfind('{')
+    json_end = stderr.rfind('}') + 1
+    if json_start >= 0 and json_end > json_start:
+        try:
+            return json.loads(stderr[json_start:json_end])
+        except json.JSONDecodeError:
+            return None
+    return None
+
+def loudnorm_filter(target_level, loudness_info=None):
+    """Linear loudnorm using measured values, or one-pass loudnorm without them."""
+    if loudness_info is None:
+        return f"loudnorm=I={target_level}:TP=-1.5:LRA=11:linear=true"
+    return (f"loudnorm=I={target_level}:TP=-1.5:LRA=11:"
+            f"measured_I={loudness_info.get('input_i', '0')}:"
+            f"measured_TP={loudness_info.get('input_tp', '0')}:"
+            f"measured_LRA={loudness_info.get('input_lra', '0')}:"
+            f"measured_thresh={loudness_info.get('input_thresh', '0')}:"
+            f"linear=true:print_format=summary")
+
+def measurement_settings(engine, silence_threshold, min_silence_duration):
+    """Everything besides the clip's contents that a loudness measurement depends on."""
+    return {
+        "engine": engine,
+        "silence_threshold": str(silence_threshold),
+        "min_silence_duration": float(min_silence_duration),
+        "sample_rate": SAMPLE_RATE
+    }
+
+def cached_measurement(cache, audio_file, settings, measure):
+    """Measurement from the cache, or measure(audio_file) and store it."""
+    key = cache.key(audio_file, settings)
+    info = cache.get(key)
+    if info is None:
+        info = measure()
+        cache.put(key, info)
+    return info
+
+def measure_trimmed_loudness(audio_file, silence_threshold, min_silence_duration):
+    """Trim and measure loudness in one ffmpeg pass, without writing the trimmed audio."""
+    result = subprocess.run([
+        "ffmpeg", "-nostdin", "-i", str(audio_file),
+        "-af", f"{trim_filter(silence_threshold, min_silence_duration)},"
+               f"aresample={SAMPLE_RATE},loudnorm=print_format=json",
+        "-f", "null", "-"
+    ], check=True, stderr=subprocess.PIPE, text=True)
+    return parse_loudnorm_json(result.stderr)
+
+def merge_single_pass(audio_files, measurements, output_path, temp_path, buffer_duration,
+                      silence_threshold, min_silence_duration, target_level):
+    """
+    Trim, normalize, insert silence buffers and concatenate every file in one ffmpeg process.
+    """
+    stereo = f"aformat=sample_fmts=fltp:sample_rates={SAMPLE_RATE}:channel_layouts=stereo"
+    trim = trim_filter(silence_threshold, min_silence_duration)
+    
+    filters = []
+    segments = []
+    for i, loudness_info in enumerate(measurements):
+        if i > 0 and buffer_duration > 0:
+            filters.append(f"anullsrc=r={SAMPLE_RATE}:cl=stereo,atrim=duration={buffer_duration},{stereo}[gap{i}]")
+            segments.append(f"[gap{i}]")
+        # loudnorm works at 192 kHz internally, so resample again after it
+        filters.append(f"[{i}:a]{trim},aresample={SAMPLE_RATE},"
+                       f"{loudnorm_filter(target_level, loudness_info)},"
+                       f"aresample={SAMPLE_RATE},{stereo}[seg{i}]")
+        segments.append(f"[seg{i}]")
+    filters.append(f"{''.join(segments)}concat=n={len(segments)}:v=0:a=1[out]")
+    graph = ";".join(filters)
+    
+    inputs = []
+    for audio_file in audio_files:
+        inputs += ["-i", str(audio_file)]
+    
+    if len(graph) > MAX_FILTER_ARG_CHARS:
+        # Very long graphs exceed the OS argument length limit
+        graph_file = temp_path / "merge_graph.txt"
+        graph_file.write_text(graph)
+        graph_args = ["-filter_complex_script", str(graph_file)]
+    else:
+        graph_args = ["-filter_complex", graph]
+    
+    subprocess.run([
+        "ffmpeg", *inputs, *graph_args, "-map", "[out]",
+        "-c:a", "libmp3lame", "-q:a", "2", "-y", str(output_path)
+    ], check=True, stderr=subprocess.PIPE)
+
+def threshold_to_db(silence_threshold):
+    """Convert an ffmpeg silence threshold ("-50dB" or an amplitude like "0.003") to dB."""
+    text = str(silence_threshold).strip()
+    if text.lower().endswith("db"):
+        return float(text[:-2])
+    return 20 * math.log10(max(float(text), 1e-10))
+
+def process_clip(audio_file, silence_threshold, min_silence_duration, target_level, cache=None):
+    """Load, trim, loudness-normalize and resample one file in-process. Returns stereo (2, frames)."""
+    import numpy as np
+    from tts_common.audio_io import read_audio
+    from tts_common.loudness import measure_loudness, normalize_loudness, resample, trim_silence
+    
+    audio, sample_rate = read_audio(audio_file)
+    audio = trim_silence(audio, sample_rate, threshold_to_db(silence_threshold), min_silence_duration)
+    measurement = None
+    if cache is not None:
+        settings = measurement_settings("numpy", silence_threshold, min_silence_duration)
+        measurement = cached_measurement(cache, audio_file, settings,
+                                         lambda: measure_loudness(audio, sample_rate))
+    audio, _ = normalize_loudness(audio, sample_rate, target_level, TRUE_PEAK_DB, measurement)
+    audio = resample(audio, sample_rate, SAMPLE_RATE)
+    if audio.shape[0] == 1:
+        audio = np.repeat(audio, 2, axis=0)
+    return audio[:2]
+
+def merge_numpy(audio_files, output_path, buffer_duration, silence_threshold,
+                min_silence_duration, target_level, workers, cache=None):
+    """
+    Process the files in-process and stream the joined audio into one ffmpeg MP3 encode.
+    """
+    import numpy as np
+    
+    silence = np.zeros((int(round(buffer_duration * SAMPLE_RATE)), 2), dtype=np.float32).tobytes()
+    
+    def process(item):
+        i, audio_file = item
+        print(f"Processing [{i+1}/{len(audio_files)}]: {audio_file.name}")
+        return process_clip(audio_file, silence_threshold, min_silence_duration, target_level, cache)
+    
+    encoder = subprocess.Popen([
+        "ffmpeg", "-v", "error", "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "2", "-i", "-",
+        "-c:a", "libmp3lame", "-q:a", "2", "-y", str(output_path)
+    ], stdin=subprocess.PIPE)
+    try:
+        # map yields in input order, so clips are encoded while later ones are still processing
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, clip in enumerate(pool.map(process, enumerate(audio_files))):
+                if i > 0 and silence:
+                    encoder.stdin.write(silence)
+                encoder.stdin.write(np.ascontiguousarray(clip.T, dtype=np.float32).tobytes())
+    finally:
+        encoder.stdin.close()
+        returncode = encoder.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, "ffmpeg")
+
+def preprocess_file(i, audio_file, total, temp_path, silence_threshold, min_silence_duration, target_level,
+                    cache=None):
+    """Trim, measure and normalize one file into temp_path. Returns the normalized file."""
+    print(f"Processing [{i+1}/{total}]: {audio_file.name}")
+    
+    # Step 1: Trim silence first
+    trimmed_file = temp_path / f"trim_{i:03d}_{audio_file.name}"
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-i", str(audio_file),
+        "-af", trim_filter(silence_threshold, min_silence_duration),
+        "-ar", str(SAMPLE_RATE), "-y", str(trimmed_file)
+    ], check=True, stderr=subprocess.PIPE)
+    
+    # Step 2: Normalize the trimmed file
+    normalized_file = temp_path / f"norm_{i:03d}_{audio_file.name}"
+    
+    # Measure loudness
+    def measure():
+        result = subprocess.run([
+            "ffmpeg", "-nostdin", "-i", str(trimmed_file), "-af", "loudnorm=print_format=json", 
+            "-f", "null", "-"
+        ], check=True, stderr=subprocess.PIPE, text=True)
+        
+        # Extract the JSON data from ffmpeg's stderr output
+        return parse_loudnorm_json(result.stderr)
+    
+    if cache is not None:
+        settings = measurement_settings("ffmpeg", silence_threshold, min_silence_duration)
+        loudness_info = cached_measurement(cache, audio_file, settings, measure)
+    else:
+        loudness_info = measure()
+    
+    # Apply normalization with measured values (one-pass fallback if unavailable)
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-i", str(trimmed_file),
+        "-af", loudnorm_filter(target_level, loudness_info),
+        "-ar", str(SAMPLE_RATE), "-y", str(normalized_file)
+    ], check=True, stderr=subprocess.PIPE)
+    
+    return normalized_file
+
+def default_workers():
+    """One ffmpeg process per usable core."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
 def normalize_trim_merge_audio(input_folder, output_file="merged_normalized.mp3", 
                              buffer_duration=0, silence_threshold="-50dB", 
-                             min_silence_duration=0, target_level=-16):
+                             min_silence_duration=0, target_level=-16,
+                             single_pass=SINGLE_PASS, workers=None, engine=ENGINE,
+                             cache_measurements=CACHE_MEASUREMENTS):
     """
     Trim silence first, then normalize and merge audio files.
     
+    The numpy engine trims, measures (ITU-R BS.1770), normalizes and true-peak
+    limits each file in-process and only uses ffmpeg to decode non-WAV inputs
+    and encode the final MP3. The ffmpeg engine does the same with filters:
+    with single_pass, each file gets one ffmpeg pass that trims and measures
+    loudness together, and a single ffmpeg process then trims, normalizes,
+    adds the silence buffers and concatenates all files (no temp audio files).
+    Otherwise every step runs as its own ffmpeg process per file.
+    
     Args:
         input_folder (str): Path to the folder containing audio files
         output_file (str): Name of the output file (default: merged_normalized.mp3)
@@ -18,6 +240,10 @@ def normalize_trim_merge_audio(input_folder, output_file="merged_normalized.mp3"
         silence_threshold (str): Threshold for silence detection (default: -50dB)
         min_silence_duration (float): Minimum silence duration to trim (default: 0 seconds)
         target_level (int): Target loudness level in LUFS (default: -16 LUFS, good for speech)
+        single_pass (bool): Merge everything in one ffmpeg graph (default: SINGLE_PASS)
+        workers (int): Files preprocessed in parallel (default: usable CPU cores)
+        engine (str): "numpy" or "ffmpeg" (default: ENGINE)
+        cache_measurements (bool): Reuse measurements of unchanged clips (default: CACHE_MEASUREMENTS)
     """
     # Convert input folder to Path object
     input_path = Path(input_folder)
@@ -35,7 +261,8 @@ def normalize_trim_merge_audio(input_folder, output_file="merged_normalized.mp3"
     # Get all audio files in the directory
     audio_extensions = {'.wav', '.mp3', '.ogg', '.flac', '.aac'}
     audio_files = [f for f in input_path.iterdir() 
-                  if f.is_file() and f.suffix.lower() in audio_extensions]
+                  if f.is_file() and f.suffix.lower() in audio_extensions
+                  and f.name != output_path.name]
     
     # Sort files by name
     audio_files.sort()
@@ -46,75 +273,67 @@ def normalize_trim_merge_audio(input_folder, output_file="merged_normalized.mp3"
     
     print(f"Found {len(audio_files)} audio files to process")
     
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, len(audio_files)))
+    
+    cache = LoudnessCache(input_path, enabled=cache_measurements)
+    
+    if engine == "numpy":
+        print(f"\nProcessing and merging {len(audio_files)} files to {output_path} with {workers} workers...")
+        merge_numpy(audio_files, output_path, buffer_duration, silence_threshold,
+                    min_silence_duration, target_level, workers, cache)
+        cache.save()
+        cache.print_stats()
+        print(f"Successfully created {output_path}")
+        return
+    
     # Create a temporary directory for processed files
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
         
+        if single_pass:
+            print(f"\nMeasuring loudness with {workers} workers...")
+            
+            def measure(item):
+                i, audio_file = item
+                print(f"Measuring [{i+1}/{len(audio_files)}]: {audio_file.name}")
+                return cached_measurement(
+                    cache, audio_file, settings,
+                    lambda: measure_trimmed_loudness(audio_file, silence_threshold, min_silence_duration)
+                )
+            
+            settings = measurement_settings("ffmpeg", silence_threshold, min_silence_duration)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                measurements = list(pool.map(measure, enumerate(audio_files)))
+            cache.save()
+            cache.print_stats()
+            
+            print(f"\nMerging {len(audio_files)} files to {output_path} in one pass")
+            merge_single_pass(audio_files, measurements, output_path, temp_path, buffer_duration,
+                              silence_threshold, min_silence_duration, target_level)
+            print(f"Successfully created {output_path}")
+            return
+        
         # Create silence file if buffer is needed
         silence_path = temp_path / "silence.wav"
         if buffer_duration > 0:
             subprocess.run([
-                "ffmpeg", "-f", "lavfi", "-i", f"anullsrc=r=44100:cl=stereo", 
+                "ffmpeg", "-f", "lavfi", "-i", f"anullsrc=r={SAMPLE_RATE}:cl=stereo", 
                 "-t", str(buffer_duration), 
                 str(silence_path)
             ], check=True, stderr=subprocess.PIPE)
         
-        # Process each audio file
-        print("\nProcessing audio files...")
-        processed_files = []
-        
-        for i, audio_file in enumerate(audio_files):
-            print(f"Processing [{i+1}/{len(audio_files)}]: {audio_file.name}")
-            
-            # Step 1: Trim silence first
-            trimmed_file = temp_path / f"trim_{i:03d}_{audio_file.name}"
-            subprocess.run([
-                "ffmpeg", "-i", str(audio_file),
-                "-af", f"silenceremove=start_periods=1:start_threshold={silence_threshold}:"
-                       f"start_silence={min_silence_duration}:detection=peak,"
-                       f"areverse,silenceremove=start_periods=1:start_threshold={silence_threshold}:"
-                       f"start_silence={min_silence_duration}:detection=peak,areverse",
-                "-ar", "44100", "-y", str(trimmed_file)
-            ], check=True, stderr=subprocess.PIPE)
-            
-            # Step 2: Normalize the trimmed file
-            normalized_file = temp_path / f"norm_{i:03d}_{audio_file.name}"
-            
-            # Measure loudness
-            result = subprocess.run([
-                "ffmpeg", "-i", str(trimmed_file), "-af", "loudnorm=print_format=json", 
-                "-f", "null", "-"
-            ], check=True, stderr=subprocess.PIPE, text=True)
-            
-            # Extract the JSON data from ffmpeg's stderr output
-            stderr = result.stderr
-            json_start = stderr.rfind('{')
-            json_end = stderr.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_data = stderr[json_start:json_end]
-                loudness_info = json.loads(json_data)
-                
-                # Apply normalization with measured values
-                subprocess.run([
-                    "ffmpeg", "-i", str(trimmed_file),
-                    "-af", f"loudnorm=I={target_level}:TP=-1.5:LRA=11:"
-                           f"measured_I={loudness_info.get('input_i', '0')}:"
-                           f"measured_TP={loudness_info.get('input_tp', '0')}:"
-                           f"measured_LRA={loudness_info.get('input_lra', '0')}:"
-                           f"measured_thresh={loudness_info.get('input_thresh', '0')}:"
-                           f"linear=true:print_format=summary",
-                    "-ar", "44100", "-y", str(normalized_file)
-                ], check=True, stderr=subprocess.PIPE)
-            else:
-                # Fallback normalization
-                subprocess.run([
-                    "ffmpeg", "-i", str(trimmed_file),
-                    "-af", f"loudnorm=I={target_level}:TP=-1.5:LRA=11:linear=true",
-                    "-ar", "44100", "-y", str(normalized_file)
-                ], check=True, stderr=subprocess.PIPE)
-            
-            processed_files.append(normalized_file)
+        # Process the files in parallel; map keeps the results in input order
+        print(f"\nProcessing audio files with {workers} workers...")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            processed_files = list(pool.map(
+                lambda item: preprocess_file(item[0], item[1], len(audio_files), temp_path,
+                                             silence_threshold, min_silence_duration, target_level, cache),
+                enumerate(audio_files)
+            ))
+        cache.save()
+        cache.print_stats()
         
         # Create concat file for ffmpeg
         concat_file = temp_path / "concat_list.txt"
@@ -1,13 +1,18 @@
 import json
 import os
+import sys
 import asyncio
-import base64
 import time
 from pathlib import Path
-import aiofiles
 from dotenv import load_dotenv
 from hume import AsyncHumeClient
-from hume.tts import PostedUtterance, PostedUtteranceVoiceWithName, PostedContextWithGenerationId
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import SynthesisCache
+from rate_limiter import RateLimiter
+from character_chains import build_character_chains, run_chains
+from line_renderer import LineRenderer
+from resume_journal import index_width
 
 # Load environment variables
 load_dotenv()
@@ -23,63 +28,45 @@ timestamp = int(time.time())
 output_dir = Path(f"./audio_output_{timestamp}")
 output_dir.mkdir(parents=True, exist_ok=True)
 
-async def write_audio_to_file(base64_encoded_audio: str, filename: str) -> None:
-    """Write base64 encoded audio to a WAV file"""
-    file_path = output_dir / f"{filename}.wav"
-    audio_data = base64.b64decode(base64_encoded_audio)
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(audio_data)
-    print(f"Wrote {file_path}")
+# Audio for unchanged lines is reused across runs
+synthesis_cache = SynthesisCache()
+
+# Pack up to this many consecutive lines of a character into one request (1 = off)
+BATCH_UTTERANCES = 1
+BATCH_CHARS = 1500  # Maximum utterance text per batched request
+
+# Stream audio chunks to disk as they arrive instead of buffering whole base64 responses
+STREAM_AUDIO = True
 
 async def generate_audio_from_script(script_file: str, maintain_character_continuity: bool = True) -> None:
-    """Generate audio for each utterance in the provided script file"""
+    """
+    Generate audio for each utterance in the provided script file.
+    
+    Each character's lines form a chain (a line only needs that character's
+    previous generation_id); the chains run in parallel under a rate limiter.
+    With BATCH_UTTERANCES > 1, consecutive lines of a chain share one request.
+    """
     # Load script from file
     with open(script_file, 'r') as f:
         script_data = json.load(f)
     
     script_lines = script_data.get("script", [])
     
-    # Dictionary to keep track of the last generation_id for each character
-    # This helps maintain voice continuity
-    character_last_gen = {}
+    # Pad indices to the script length so filenames keep sorting in order
+    width = index_width(len(script_lines))
+    
+    renderer = LineRenderer(
+        hume, output_dir, synthesis_cache, RateLimiter(), get_voice_for_character,
+        maintain_character_continuity=maintain_character_continuity,
+        stream_audio=STREAM_AUDIO,
+        index_width=width,
+        batch_utterances=BATCH_UTTERANCES,
+        batch_chars=BATCH_CHARS
+    )
     
-    # Process each utterance in the script
-    for i, line in enumerate(script_lines):
-        character = line.get("character", "UNKNOWN")
-        utterance = line.get("utterance", "")
-        voice_direction = line.get("voiceDirection", "")
-        
-        # Get voice for character
-        voice_name = get_voice_for_character(character)
-        
-        print(f"Generating audio for {character}: '{utterance[:30]}...'")
-        
-        # Prepare context if we have previous generations for this character
-        context = None
-        if maintain_character_continuity and character in character_last_gen:
-            context = PostedContextWithGenerationId(
-                generation_id=character_last_gen[character]
-            )
-        
-        # Call Hume TTS API
-        response = await hume.tts.synthesize_json(
-            utterances=[
-                PostedUtterance(
-                    voice={ "name": voice_name, "provider": "HUME_AI" },
-                    description=voice_direction,
-                    text=utterance,
-                )
-            ],
-            context=context,
-            num_generations=1
-        )
-        
-        # Store the generation_id for future utterances from this character
-        character_last_gen[character] = response.generations[0].generation_id
-        
-        # Save audio file
-        filename = f"{i:03d}_{character.lower().replace(' ', '_')}"
-        await write_audio_to_file(response.generations[0].audio, filename)
+    chains = build_character_chains(enumerate(script_lines), maintain_character_continuity)
+    print(f"Rendering {len(script_lines)} lines as {len(chains)} parallel chains")
+    await run_chains(chains, renderer.process_chain)
 
 def get_voice_for_character(character: str) -> str:
 
@@ -111,6 +98,7 @@ async def main():
     print(f"Output will be saved to {output_dir}")
     
     await generate_audio_from_script(script_file)
+    synthesis_cache.print_stats()
     print("Audio generation complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+"""
+Token-bucket rate limiting for concurrent Hume API calls.
+
+`RateLimiter` bounds both the request rate (tokens refill at `rate` per
+second, up to `burst`) and the number of requests in flight. When the API
+answers 429, `call_with_backoff` pauses every caller for the Retry-After
+delay (or an exponential backoff), halves the rate, and then creeps back up
+towards the configured rate as requests succeed again.
+
+Usage:
+    limiter = RateLimiter(rate=2.0, max_concurrency=8)
+    response = await call_with_backoff(limiter, lambda: hume.tts.synthesize_json(...))
+"""
+
+import asyncio
+import random
+import time
+
+REQUESTS_PER_SECOND = 2.0  # Sustained request rate
+MAX_CONCURRENCY = 8  # Requests in flight at once
+MIN_REQUESTS_PER_SECOND = 0.1  # Floor for the adaptive rate after 429s
+RATE_RECOVERY = 0.1  # Fraction of the configured rate regained per successful request
+MAX_RETRIES = 6  # Retries per request after a 429
+BASE_BACKOFF_SECONDS = 1.0  # First backoff when the server sends no Retry-After
+
+
+class RateLimiter:
+    """Token bucket plus a concurrency cap, with adaptive slow-down on 429."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, max_concurrency=MAX_CONCURRENCY, burst=None,
+                 min_rate=MIN_REQUESTS_PER_SECOND):
+        """
+        Args:
+            rate: Requests per second
+            max_concurrency: Maximum requests in flight
+            burst: Bucket size (default: max(1, rate))
+            min_rate: Lowest rate the limiter backs off to
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.rate_limited = 0  # 429 responses seen
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def _take_token(self):
+        # Callers queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._slots.release()
+
+    def on_success(self):
+        """Additive increase back towards the configured rate."""
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+
+    def on_rate_limited(self, delay):
+        """Multiplicative decrease, and pause everyone for `delay` seconds."""
+        self.rate_limited += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+
+def is_rate_limited(error):
+    """True if the exception is an HTTP 429 from the API."""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error):
+    """Retry-After delay from the error's response headers, if any."""
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def call_with_backoff(limiter, request, max_retries=MAX_RETRIES):
+    """
+    Run `request()` (a coroutine function) under the limiter, retrying on 429.
+
+    Returns:
+        The request's result
+    """
+    for attempt in range(max_retries + 1):
+        async with limiter:
+            try:
+                result = await request()
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == max_retries:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = BASE_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5)
+                limiter.on_rate_limited(delay)
+                print(f"Rate limited, backing off {delay:.1f}s (now {limiter.rate:.2f} req/s)")
+                continue
+        limiter.on_success()
+        return result
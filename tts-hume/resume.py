@@ -1,16 +1,22 @@
 import json
 import os
+import sys
 import asyncio
-import base64
 import time
 import re
 from pathlib import Path
-import aiofiles
 from dotenv import load_dotenv
 from hume import AsyncHumeClient
-from hume.tts import PostedUtterance, PostedUtteranceVoiceWithName, PostedContextWithGenerationId
 from typing import List, Dict, Any, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import SynthesisCache
+from rate_limiter import RateLimiter, REQUESTS_PER_SECOND, MAX_CONCURRENCY
+from character_chains import build_character_chains, run_chains
+from utterance_batches import MAX_BATCH_UTTERANCES, MAX_BATCH_CHARS
+from line_renderer import LineRenderer
+from resume_journal import ResumeJournal, index_width
+
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("HUME_API_KEY")
@@ -22,17 +28,24 @@ hume = AsyncHumeClient(api_key=api_key, timeout=300)
 
 generation_context_file = 'generation_context.json'
 
+# Audio for unchanged lines is reused across runs
+synthesis_cache = SynthesisCache()
+
 
 def filter_completed_script_entries(script_file: str, audio_dir: str) -> List[Dict[str, Any]]:
     """
-    Filter out script entries that already have corresponding audio files.
+    Filter out script entries that were already completed in audio_dir.
+    
+    Uses the directory's resume journal when it has one: a line is done only if
+    its text is unchanged and its audio file is intact. Directories from before
+    the journal fall back to matching NNN_character.wav filenames.
     
     Args:
         script_file: Path to the JSON script file
         audio_dir: Directory containing previously generated audio files
         
     Returns:
-        List of script entries that need to be processed (those without audio files)
+        List of script entries that need to be processed
     """
     # Load script from file
     with open(script_file, 'r') as f:
@@ -46,24 +59,26 @@ def filter_completed_script_entries(script_file: str, audio_dir: str) -> List[Di
         print(f"Warning: Audio directory {audio_dir} not found. Processing all script entries.")
         return script_lines
     
-    # Get all WAV files in the directory
-    existing_files = [f.name for f in audio_path.glob("*.wav")]
-    
-    # Extract indices from filenames using regex pattern
-    # Format is assumed to be: 000_character_name.wav
-    completed_indices = set()
-    pattern = r"^(\d{3})_.*\.wav$"
-    
-    for filename in existing_files:
-        match = re.match(pattern, filename)
-        if match:
-            index = int(match.group(1))
-            completed_indices.add(index)
+    journal = ResumeJournal(audio_path)
+    if journal.entries:
+        def is_completed(i, line):
+            return journal.completed_entry(i, line) is not None
+    else:
+        # No journal: extract indices from filenames (000_character_name.wav)
+        completed_indices = set()
+        pattern = r"^(\d+)_.*\.wav$"
+        for f in audio_path.glob("*.wav"):
+            match = re.match(pattern, f.name)
+            if match:
+                completed_indices.add(int(match.group(1)))
+        
+        def is_completed(i, line):
+            return i in completed_indices
     
     # Filter out script entries that already have audio files
     filtered_script = []
     for i, line in enumerate(script_lines):
-        if i not in completed_indices:
+        if not is_completed(i, line):
             # Add original index so we maintain consistent filenames
             line["originalIndex"] = i
             filtered_script.append(line)
@@ -80,15 +95,33 @@ async def generate_audio_from_script(
     output_dir: Path,
     previous_audio_dir: Optional[str] = None, 
     maintain_character_continuity: bool = True,
-    _character_last_gen: Dict[str, any] = {}
+    _character_last_gen: Dict[str, any] = {},
+    limiter: Optional[RateLimiter] = None,
+    batch_utterances: int = MAX_BATCH_UTTERANCES,
+    batch_chars: int = MAX_BATCH_CHARS,
+    journal: Optional[ResumeJournal] = None,
+    stream_audio: bool = True
 ) -> None:
-    """Generate audio for each utterance in the provided script file"""
+    """
+    Generate audio for each utterance in the provided script file.
+    
+    Each character's lines form a chain (a line only needs that character's
+    previous generation_id); the chains run in parallel under `limiter`
+    (requests/sec and max in-flight requests). With batch_utterances > 1,
+    consecutive lines of a chain are sent as one multi-utterance request
+    (up to batch_chars of text) and split back into per-line files.
+    Completed lines are appended to `journal` (default: output_dir's journal).
+    With stream_audio, audio is written chunk by chunk as it arrives.
+    """
     # Load script from file
     with open(script_file, 'r') as f:
         script_data = json.load(f)
     
     script_lines = script_data.get("script", [])
     
+    # Pad indices to the full script length so filenames keep sorting in order
+    width = index_width(len(script_lines))
+    
     # Filter out already processed entries if previous_audio_dir is provided
     if previous_audio_dir:
         script_lines = filter_completed_script_entries(script_file, previous_audio_dir)
@@ -96,61 +129,32 @@ async def generate_audio_from_script(
             print("All script entries have already been processed. Nothing to do.")
             return
     
-    # Dictionary to keep track of the last generation_id for each character
-    character_last_gen = _character_last_gen.copy()
+    if limiter is None:
+        limiter = RateLimiter()
+    if journal is None:
+        journal = ResumeJournal(output_dir)
+    
+    # Keeps each character's last generation_id for voice continuity and
+    # records every finished line in the journal
+    renderer = LineRenderer(
+        hume, output_dir, synthesis_cache, limiter, get_voice_for_character,
+        character_last_gen=_character_last_gen,
+        maintain_character_continuity=maintain_character_continuity,
+        stream_audio=stream_audio,
+        index_width=width,
+        batch_utterances=batch_utterances,
+        batch_chars=batch_chars,
+        on_line_done=lambda job, generation_id, file_path: journal.record(
+            job["index"], job["line"], generation_id, file_path)
+    )
     
-    # Process each utterance in the script
-    for line in script_lines:
-        character = line.get("character", "UNKNOWN")
-        utterance = line.get("utterance", "")
-        voice_direction = line.get("voiceDirection", "")
-        
-        # Get original index from script for filename consistency
-        original_index = line.get("originalIndex", script_lines.index(line))
-        
-        # Get voice for character
-        voice_name = get_voice_for_character(character)
-        
-        print(f"Generating audio for {character}: '{utterance[:30]}...'")
-        
-        # Prepare context if we have previous generations for this character
-        context = None
-        if maintain_character_continuity and character in character_last_gen:
-            context = PostedContextWithGenerationId(
-                generation_id=character_last_gen[character]
-            )
-        
-        # Call Hume TTS API
-        await asyncio.sleep(2) # rate-limit calls to the api
-        response = await hume.tts.synthesize_json(
-            utterances=[
-                PostedUtterance(
-                    voice={ "name": voice_name, "provider": "HUME_AI" },
-                    description=voice_direction,
-                    text=utterance,
-                )
-            ],
-            context=context,
-            num_generations=1
-        )
-        
-        # Store the generation_id for future utterances from this character
-        character_last_gen[character] = response.generations[0].generation_id
-        with open('character_last_gen.json', 'w') as f:
-            json.dump(character_last_gen, f, indent=2)
-        
-        # Save audio file
-        filename = f"{original_index:03d}_{character.lower().replace(' ', '_')}"
-        await write_audio_to_file(response.generations[0].audio, output_dir, filename)
-
-
-async def write_audio_to_file(base64_encoded_audio: str, output_dir: Path, filename: str) -> None:
-    """Write base64 encoded audio to a WAV file"""
-    file_path = output_dir / f"{filename}.wav"
-    audio_data = base64.b64decode(base64_encoded_audio)
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(audio_data)
-    print(f"Wrote {file_path}")
+    chains = build_character_chains(enumerate(script_lines), maintain_character_continuity)
+    print(f"Rendering {len(script_lines)} lines as {len(chains)} parallel chains")
+    
+    start_time = time.monotonic()
+    await run_chains(chains, renderer.process_chain)
+    print(f"Processed {len(script_lines)} lines in {time.monotonic() - start_time:.1f}s "
+          f"({limiter.rate_limited} rate-limited responses)")
 
 
 def get_voice_for_character(character: str) -> str:
@@ -176,13 +180,23 @@ async def main():
     parser = argparse.ArgumentParser(description="Generate audio from script JSON file")
     parser.add_argument("script_file", help="Path to the JSON script file")
     parser.add_argument("--previous-dir", "-p", help="Path to directory with previously generated audio files")
+    parser.add_argument("--output-dir", "-o", help="Write into this directory (e.g. the previous one, to resume in place) instead of a new timestamped one")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="Maximum API requests per second")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Maximum API requests in flight")
+    parser.add_argument("--batch-utterances", type=int, default=MAX_BATCH_UTTERANCES, help="Lines packed into one request (1 = no batching)")
+    parser.add_argument("--no-stream", action="store_true", help="Fetch each response whole instead of streaming audio to disk")
+    parser.add_argument("--batch-chars", type=int, default=MAX_BATCH_CHARS, help="Maximum utterance text per batched request")
     
     args = parser.parse_args()
     
     # Create output directory
-    timestamp = int(time.time())
-    output_dir = Path(f"./audio_output_{timestamp}")
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+    else:
+        timestamp = int(time.time())
+        output_dir = Path(f"./audio_output_{timestamp}")
     output_dir.mkdir(parents=True, exist_ok=True)
+    journal = ResumeJournal(output_dir)
     
     print(f"Reading script from {args.script_file}")
     print(f"Output will be saved to {output_dir}")
@@ -190,21 +204,35 @@ async def main():
     if args.previous_dir:
         print(f"Checking for previously generated files in {args.previous_dir}")
         
-    try:
-        with open('character_last_gen.json', 'r') as f:
-            character_last_gen = json.loads(f.read())
-    except:
-        character_last_gen = {}
+    # Continuity state comes from the journals (each character's latest line);
+    # character_last_gen.json is only read for runs from before the journal
+    character_last_gen = {}
+    if args.previous_dir:
+        character_last_gen.update(ResumeJournal(args.previous_dir).last_generation_ids())
+    character_last_gen.update(journal.last_generation_ids())
+    if not character_last_gen:
+        try:
+            with open('character_last_gen.json', 'r') as f:
+                character_last_gen = json.loads(f.read())
+        except:
+            character_last_gen = {}
         
     print(character_last_gen)
     
     await generate_audio_from_script(
         args.script_file, 
         output_dir,
-        args.previous_dir, 
-        character_last_gen
+        args.previous_dir or args.output_dir, 
+        _character_last_gen=character_last_gen,
+        limiter=RateLimiter(rate=args.rps, max_concurrency=args.concurrency),
+        batch_utterances=args.batch_utterances,
+        batch_chars=args.batch_chars,
+        journal=journal,
+        stream_audio=not args.no_stream
     )
+    journal.close()
     
+    synthesis_cache.print_stats()
     print("Audio generation complete!")
 
 
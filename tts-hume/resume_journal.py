@@ -0,0 +1,117 @@
+"""
+Append-only resume journal for Hume script rendering.
+
+Every completed line is appended to `<audio dir>/journal.jsonl` (and fsync'd)
+once its audio file is safely on disk:
+
+    {"index": 12, "hash": "...", "character": "NARRATOR",
+     "generation_id": "...", "file": "012_narrator.wav", "bytes": 123456}
+
+On resume a line counts as done only if its journal entry exists, the script
+line's hash still matches (text, character and direction unchanged) and the
+audio file has the recorded size. Interrupted or corrupt writes, edited lines
+and deleted files are therefore regenerated. A torn last journal line from a
+crash is ignored.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+def line_hash(line: Dict[str, Any]) -> str:
+    """Hash of everything in a script line that affects its audio."""
+    content = json.dumps(
+        [line.get("character", "UNKNOWN"), line.get("utterance", ""), line.get("voiceDirection", "")],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def index_width(line_count: int) -> int:
+    """Zero-padding for line indices: at least 3 digits, more for long scripts."""
+    return max(3, len(str(max(0, line_count - 1))))
+
+
+def load_journal(directory) -> Dict[int, Dict[str, Any]]:
+    """Read a journal into {index: latest entry}; missing journal gives {}."""
+    entries: Dict[int, Dict[str, Any]] = {}
+    path = Path(directory) / JOURNAL_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, raw in enumerate(f, start=1):
+                try:
+                    entry = json.loads(raw)
+                    entries[int(entry["index"])] = entry
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    print(f"Warning: skipping unreadable journal line {line_number} in {path}")
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class ResumeJournal:
+    """Durable record of completed lines for one audio directory."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.entries = load_journal(self.directory)
+        self._file = None
+
+    def completed_entry(self, index: int, line: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The journal entry if line `index` is done and its audio is intact, else None."""
+        entry = self.entries.get(index)
+        if entry is None or entry.get("hash") != line_hash(line):
+            return None
+        try:
+            size = (self.directory / entry["file"]).stat().st_size
+        except OSError:
+            return None
+        return entry if size == entry.get("bytes") else None
+
+    def record(self, index: int, line: Dict[str, Any], generation_id: Optional[str], file_path) -> None:
+        """Append a completed line and fsync it. Call only after the audio file is durable."""
+        file_path = Path(file_path)
+        entry = {
+            "index": index,
+            "hash": line_hash(line),
+            "character": line.get("character", "UNKNOWN"),
+            "generation_id": generation_id,
+            "file": os.path.relpath(file_path, self.directory),
+            "bytes": file_path.stat().st_size
+        }
+        if self._file is None:
+            self._file = self._open_for_append()
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[index] = entry
+
+    def _open_for_append(self):
+        path = self.directory / JOURNAL_FILE
+        f = open(path, "a", encoding="utf-8")
+        # Terminate a torn last line from a crash so new entries start cleanly
+        if path.stat().st_size > 0:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    f.write("\n")
+        return f
+
+    def last_generation_ids(self) -> Dict[str, str]:
+        """Each character's generation_id from its latest line in script order."""
+        last: Dict[str, str] = {}
+        for index in sorted(self.entries):
+            entry = self.entries[index]
+            if entry.get("generation_id"):
+                last[entry["character"]] = entry["generation_id"]
+        return last
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
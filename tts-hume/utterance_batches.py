@@ -0,0 +1,82 @@
+"""
+Multi-utterance batching for Hume TTS requests.
+
+Several consecutive lines can be sent as the utterances of one
+`synthesize_json` request, paying one round trip and one context setup
+instead of one per line. The response carries the audio split into
+snippets tagged with their utterance index, which `split_utterance_audio`
+reassembles into one audio file per line.
+
+Usage:
+    if batch and not fits_batch(batch_texts, text):
+        flush(batch)
+    ...
+    for audio in split_utterance_audio(response.generations[0], len(batch)):
+        write(base64.b64decode(audio))
+"""
+
+import base64
+import io
+import wave
+from typing import List
+
+MAX_BATCH_UTTERANCES = 1  # Lines per request (1 = one request per line)
+MAX_BATCH_CHARS = 1500  # Total utterance text per request
+
+
+def fits_batch(batch_texts: List[str], text: str, max_utterances: int = MAX_BATCH_UTTERANCES,
+               max_chars: int = MAX_BATCH_CHARS) -> bool:
+    """True if `text` can join a batch already holding `batch_texts`."""
+    if len(batch_texts) + 1 > max_utterances:
+        return False
+    return sum(len(t) for t in batch_texts) + len(text) <= max_chars
+
+
+def join_audio(parts: List[bytes]) -> bytes:
+    """Concatenate audio files: WAV frames are re-wrapped in one header, anything else is appended."""
+    if len(parts) == 1:
+        return parts[0]
+    if not all(part[:4] == b"RIFF" for part in parts):
+        return b"".join(parts)  # e.g. MP3 frames concatenate as-is
+
+    output = io.BytesIO()
+    with wave.open(io.BytesIO(parts[0]), "rb") as first:
+        params = first.getparams()
+    with wave.open(output, "wb") as joined:
+        joined.setparams(params)
+        for part in parts:
+            with wave.open(io.BytesIO(part), "rb") as snippet:
+                joined.writeframes(snippet.readframes(snippet.getnframes()))
+    return output.getvalue()
+
+
+def split_utterance_audio(generation, count: int) -> List[str]:
+    """
+    Split a multi-utterance generation back into per-utterance audio.
+
+    Args:
+        generation: One entry of response.generations
+        count: Number of utterances sent in the request
+
+    Returns:
+        Base64 encoded audio for each utterance, in request order
+    """
+    if count == 1:
+        return [generation.audio]
+
+    # Snippets come grouped per utterance; utterance_index says which one
+    grouped: List[List[str]] = [[] for _ in range(count)]
+    for position, group in enumerate(generation.snippets or []):
+        for snippet in group:
+            index = snippet.utterance_index if snippet.utterance_index is not None else position
+            grouped[index].append(snippet.audio)
+
+    missing = [i for i, parts in enumerate(grouped) if not parts]
+    if missing:
+        raise ValueError(f"Hume response has no audio snippets for utterances {missing}")
+
+    return [
+        parts[0] if len(parts) == 1
+        else base64.b64encode(join_audio([base64.b64decode(p) for p in parts])).decode("ascii")
+        for parts in grouped
+    ]
@@ -2,13 +2,24 @@
 """
 Comprehensive Piper-TTS Test Suite
 Tests various non-verbal cues, prosody features, and workarounds
+
+Tests are synthesized in-process with the piper-tts Python API, loading each
+.onnx model once (VoicePool). Without piper-tts installed, or if a model fails
+to load, the piper CLI is run per test instead.
 """
 
 import os
 import subprocess
+import wave
 from datetime import datetime
 from pathlib import Path
 
+try:
+    from piper import PiperVoice
+    from piper.config import SynthesisConfig
+except ImportError:
+    PiperVoice = None  # Fall back to the piper CLI
+
 # Test categories with descriptions and test cases
 TEST_SUITE = {
     "baseline_tests": {
@@ -378,15 +389,68 @@ TEST_SUITE = {
     }
 }
 
-def generate_audio(text, output_file, model="voices/en_US-lessac-medium", **params):
-    """Generate audio using Piper TTS with specified parameters"""
-    # Check if we're in a virtual environment and use the correct piper path
-    piper_cmd = "piper"
+class VoicePool:
+    """Loaded Piper voices, one per model file, shared by every test."""
+    
+    def __init__(self):
+        self._voices = {}
+    
+    def get(self, model):
+        """Loaded voice for a model path (with or without .onnx), or None if unavailable."""
+        model_path = model if model.endswith(".onnx") else f"{model}.onnx"
+        if model_path not in self._voices:
+            voice = None
+            if PiperVoice is not None:
+                try:
+                    voice = PiperVoice.load(model_path)
+                    print(f"Loaded voice: {model_path}")
+                except Exception as e:
+                    print(f"Could not load {model_path} in-process ({e}), using the piper CLI")
+            self._voices[model_path] = voice
+        return self._voices[model_path]
+
+voice_pool = VoicePool()
+
+def piper_command():
+    """The piper CLI, preferring the one in ./venv-piper"""
     venv_piper = "./venv-piper/bin/piper"
     if os.path.exists(venv_piper):
-        piper_cmd = venv_piper
-    
-    cmd = [piper_cmd, "--model", model, "-f", output_file]
+        return venv_piper
+    return "piper"
+
+def synthesize_in_process(voice, text, output_file, sentence_silence=0.0, **settings):
+    """Synthesize with a loaded voice, adding sentence_silence after each sentence like the CLI"""
+    config = SynthesisConfig(**settings) if settings else None
+    with wave.open(output_file, "wb") as wav_file:
+        format_set = False
+        for chunk in voice.synthesize(text, syn_config=config):
+            if not format_set:
+                wav_file.setframerate(chunk.sample_rate)
+                wav_file.setsampwidth(chunk.sample_width)
+                wav_file.setnchannels(chunk.sample_channels)
+                format_set = True
+            wav_file.writeframes(chunk.audio_int16_bytes)
+            if sentence_silence > 0:
+                silence_frames = int(sentence_silence * chunk.sample_rate)
+                wav_file.writeframes(bytes(silence_frames * chunk.sample_width * chunk.sample_channels))
+        if not format_set:
+            raise ValueError("No audio generated")
+
+def generate_audio(text, output_file, model="voices/en_US-lessac-medium", **params):
+    """Generate audio using Piper TTS with specified parameters"""
+    voice = voice_pool.get(model)
+    if voice is not None:
+        try:
+            synthesize_in_process(voice, text, output_file, **params)
+            return True
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            return False
+    return generate_audio_cli(text, output_file, model, **params)
+
+def generate_audio_cli(text, output_file, model="voices/en_US-lessac-medium", **params):
+    """Generate audio with one piper CLI process (reloads the model every call)"""
+    cmd = [piper_command(), "--model", model, "-f", output_file]
     
     # Add optional parameters
     if "sentence_silence" in params:
@@ -415,7 +479,8 @@ def run_test_suite(output_dir="test_outputs", model="voices/en_US-lessac-medium"
     with open(results_file, "w") as f:
         f.write(f"# Piper TTS Test Results\n\n")
         f.write(f"**Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"**Model**: {model}\n\n")
+        f.write(f"**Model**: {model}\n")
+        f.write(f"**Engine**: {'in-process' if voice_pool.get(model) else 'piper CLI'}\n\n")
         
         # Run each test category
         for category_key, category_data in TEST_SUITE.items():
@@ -471,21 +536,17 @@ def run_test_suite(output_dir="test_outputs", model="voices/en_US-lessac-medium"
     return test_dir
 
 if __name__ == "__main__":
-    # Check if Piper is available
-    piper_cmd = "piper"
-    venv_piper = "./venv-piper/bin/piper"
-    if os.path.exists(venv_piper):
-        piper_cmd = venv_piper
-    
-    try:
-        # Piper doesn't have --version, so check with --help
-        result = subprocess.run([piper_cmd, "--help"], capture_output=True)
-        if result.returncode != 0 and "usage: piper" not in result.stderr.decode():
-            raise FileNotFoundError
-    except FileNotFoundError:
-        print("Error: Piper TTS is not installed or not in PATH")
-        print("Install from: https://github.com/rhasspy/piper")
-        exit(1)
+    # Check if Piper is available (the CLI is only needed without the Python package)
+    if PiperVoice is None:
+        try:
+            # Piper doesn't have --version, so check with --help
+            result = subprocess.run([piper_command(), "--help"], capture_output=True)
+            if result.returncode != 0 and "usage: piper" not in result.stderr.decode():
+                raise FileNotFoundError
+        except FileNotFoundError:
+            print("Error: Piper TTS is not installed or not in PATH")
+            print("Install with: pip install piper-tts (or from https://github.com/rhasspy/piper)")
+            exit(1)
     
     # Run the test suite
     print("Starting Piper TTS Comprehensive Test Suite")
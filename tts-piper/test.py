@@ -18,6 +18,9 @@ except ImportError as e:
     print(f"Error: Piper not installed. Run: pip install piper-tts")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tts_common import SynthesisCache
+
 # Available voices (based on files in voices directory)
 VOICES = {
     "lessac": "en_US-lessac-medium",
@@ -38,6 +41,9 @@ DEFAULT_VOICE = VOICES["cori"]
 DEFAULT_OUTPUT_DIR = "outputs"
 VOICE_DIR = "voices"
 
+# Audio for unchanged text/settings is reused across runs
+synthesis_cache = SynthesisCache()
+
 # Test texts with settings
 TEST_TEXTS = {
     "basic": ("Hello! This is a test of Piper text-to-speech.", {}),
@@ -69,11 +75,26 @@ def load_voice(voice_key):
         return None
 
 
-def synthesize_text(voice, text, output_path, config=None):
-    """Synthesize text to WAV file."""
+def voice_model_id(voice_key):
+    """Identify a voice model file for the synthesis cache (name, size, mtime)."""
+    voice_name = VOICES.get(voice_key, voice_key)
+    stat = (Path(VOICE_DIR) / f"{voice_name}.onnx").stat()
+    return f"{voice_name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def synthesize_text(voice, text, output_path, config=None, voice_id=None):
+    """Synthesize text to WAV file, reusing cached audio when voice_id is given."""
+    cache_key = None
+    if voice_id:
+        cache_key = synthesis_cache.key("piper", voice_id, None, text, vars(config) if config else {})
+        if synthesis_cache.fetch(cache_key, output_path):
+            return True
+    
     try:
         with wave.open(str(output_path), "wb") as wav_file:
             voice.synthesize_wav(text, wav_file, syn_config=config)
+        if cache_key:
+            synthesis_cache.store(cache_key, output_path)
         return True
     except Exception as e:
         print(f"Error synthesizing: {e}")
@@ -108,6 +129,7 @@ def main():
         return 1
     
     print(f"Loaded voice: {args.voice}")
+    voice_id = voice_model_id(args.voice)
     passed = 0
     total = 0
     
@@ -117,7 +139,7 @@ def main():
         text, _ = TEST_TEXTS["basic"]
         output_path = output_dir / "test_basic.wav"
         
-        if synthesize_text(voice, text, output_path):
+        if synthesize_text(voice, text, output_path, voice_id=voice_id):
             size = output_path.stat().st_size
             print(f"✓ Basic synthesis: {size} bytes")
             passed += 1
@@ -134,7 +156,7 @@ def main():
             
             config = SynthesisConfig(**settings) if settings else None
             
-            if synthesize_text(voice, text, output_path, config):
+            if synthesize_text(voice, text, output_path, config, voice_id=voice_id):
                 print(f"✓ Config test '{name}': success")
                 passed += 1
             else:
@@ -152,6 +174,7 @@ def main():
             print("✗ Streaming failed")
     
     # Summary
+    synthesis_cache.print_stats()
     print(f"\nTotal: {passed}/{total} tests passed")
     return 0 if passed == total else 1
 
@@ -0,0 +1,12 @@
+"""
+Helpers shared by the engine folders (tts-chatterbox, tts-hume, tts-gemini, tts-piper).
+
+Scripts in those folders add the repository root to `sys.path` before importing
+from here, since each folder is run from its own directory.
+
+`loudness` and `audio_io` need NumPy and are imported from their modules
+directly (e.g. `from tts_common.loudness import normalize_loudness`).
+"""
+
+from .synthesis_cache import SynthesisCache, cache_key
+from .wav_writer import WavWriter, parse_wav_header, wav_header, write_wav
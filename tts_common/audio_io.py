@@ -0,0 +1,72 @@
+"""
+Read audio files into float NumPy arrays for the in-process loudness tools.
+
+WAV files (8/16/24/32-bit PCM and 32/64-bit float) are parsed directly; other
+formats are decoded by piping them through ffmpeg as float WAV.
+
+Usage:
+    audio, sample_rate = read_audio("clip.wav")  # audio shaped (channels, frames)
+"""
+
+import struct
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+from .wav_writer import parse_wav_header
+
+
+def decode_wav_bytes(data):
+    """
+    Decode WAV file contents.
+
+    Returns:
+        (float32 array shaped (channels, frames), sample_rate)
+    """
+    sample_rate, num_channels, sample_width, float_samples, offset = parse_wav_header(data)
+
+    # Honour the data chunk size unless it is a streaming placeholder
+    declared, = struct.unpack_from("<I", data, offset - 4)
+    end = offset + declared if 0 < declared <= len(data) - offset else len(data)
+    block_align = num_channels * sample_width
+    end = offset + (end - offset) // block_align * block_align
+    raw = memoryview(data)[offset:end]
+
+    if float_samples:
+        samples = np.frombuffer(raw, dtype="<f4" if sample_width == 4 else "<f8").astype(np.float32)
+    elif sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (packed[:, 0].astype(np.int32) | (packed[:, 1].astype(np.int32) << 8)
+                | (packed[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    return samples.reshape(-1, num_channels).T, sample_rate
+
+
+def read_audio(path):
+    """
+    Load an audio file as float32 (channels, frames).
+
+    Returns:
+        (audio, sample_rate)
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return decode_wav_bytes(data)
+
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", str(path), "-c:a", "pcm_f32le", "-f", "wav", "-"],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    return decode_wav_bytes(result.stdout)
@@ -0,0 +1,213 @@
+"""
+Content-addressed synthesis cache shared by every TTS engine in this repo.
+
+Audio is stored under a sha256 of (engine, model, voice, text, params), so
+re-rendering a script only synthesizes the lines whose text or settings
+changed. Entries are evicted least-recently-used once the cache grows past
+its size limit, and hit/miss counts are kept for a summary at the end of a run.
+
+Usage:
+    cache = SynthesisCache()
+    key = cache.key("piper", "en_US-lessac-medium", None, text, {"length_scale": 1.2})
+    if not cache.fetch(key, output_path):
+        ...synthesize to output_path...
+        cache.store(key, output_path)
+    cache.print_stats()
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".tts_cache"
+DEFAULT_MAX_MB = 2048
+EVICT_TO_FRACTION = 0.9  # Evict down to this fraction of max_bytes to avoid evicting on every store
+
+
+def cache_key(engine, model, voice, text, params=None):
+    """Stable sha256 key for one synthesis request."""
+    payload = json.dumps(
+        {
+            "engine": engine,
+            "model": model,
+            "voice": voice,
+            "text": text,
+            "params": params or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """On-disk audio cache with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir=None, max_bytes=None, enabled=True):
+        """
+        Args:
+            cache_dir: Cache directory (default: $TTS_CACHE_DIR or <repo>/.tts_cache)
+            max_bytes: Size limit before LRU eviction (default: $TTS_CACHE_MAX_MB or 2048 MB)
+            enabled: Set to False to turn every lookup into a miss and skip stores
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("TTS_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("TTS_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._total_bytes = None  # Computed lazily on the first store
+        self._lock = threading.Lock()  # Renderers may store from background save threads
+
+    key = staticmethod(cache_key)
+
+    def _audio_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.audio"
+
+    def _meta_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _lookup(self, key):
+        """Return the cached audio path and mark it recently used, or None."""
+        if not self.enabled:
+            self.misses += 1
+            return None
+        path = self._audio_path(key)
+        try:
+            os.utime(path)  # mtime doubles as the LRU timestamp
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def fetch(self, key, dest):
+        """Copy cached audio to dest. Returns True on a hit."""
+        path = self._lookup(key)
+        if path is None:
+            return False
+        shutil.copyfile(path, dest)
+        return True
+
+    def get_bytes(self, key):
+        """Return cached audio bytes, or None on a miss."""
+        path = self._lookup(key)
+        if path is None:
+            return None
+        return path.read_bytes()
+
+    def get_meta(self, key):
+        """Return the metadata stored with an entry, or None."""
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store(self, key, src, meta=None):
+        """Copy an audio file into the cache."""
+        if not self.enabled:
+            return
+        self._write(key, meta, lambda tmp: shutil.copyfile(src, tmp))
+
+    def put_bytes(self, key, data, meta=None):
+        """Store audio bytes in the cache."""
+        if not self.enabled:
+            return
+        self._write(key, meta, lambda tmp: Path(tmp).write_bytes(data))
+
+    def _write(self, key, meta, write_fn):
+        path = self._audio_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so concurrent renderers never see a partial entry.
+        # Each write gets its own temp file: threads may store the same key at once.
+        tmp = self._temp_path(path)
+        try:
+            write_fn(tmp)
+            size = tmp.stat().st_size
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+        if meta is not None:
+            meta_tmp = self._temp_path(self._meta_path(key))
+            try:
+                with open(meta_tmp, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(meta_tmp, self._meta_path(key))
+            finally:
+                meta_tmp.unlink(missing_ok=True)
+
+        with self._lock:
+            self.stores += 1
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size - previous
+            if self._total_bytes > self.max_bytes:
+                self.evict()
+
+    @staticmethod
+    def _temp_path(dest):
+        """A new, uniquely named temp file next to dest."""
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f"{dest.name}.", suffix=".tmp")
+        os.close(fd)
+        return Path(tmp)
+
+    def _entries(self):
+        """(mtime, size, path) for every cached audio file."""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*/*.audio"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache is under its limit."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self):
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def print_stats(self):
+        """Print a one-line cache summary."""
+        s = self.stats()
+        print(f"Synthesis cache: {s['hits']} hits, {s['misses']} misses "
+              f"({s['hit_rate']:.0%} hit rate), {s['stores']} stored, "
+              f"{s['evictions']} evicted [{self.cache_dir}]")
@@ -0,0 +1,173 @@
+"""
+Incremental WAV writer.
+
+Writes a RIFF header up front, appends sample data as it is produced and
+patches the chunk sizes on close, so long recordings can be written without
+holding the whole file in memory. Sample data is written through memoryviews
+and never concatenated with the header, so no extra copy of the audio is made.
+
+Usage:
+    with WavWriter("out.wav", sample_rate=24000, num_channels=1, sample_width=4, float_samples=True) as wav:
+        for block in blocks:
+            wav.write(block)  # any bytes-like object: bytes, memoryview, numpy array
+
+    write_wav("out.wav", pcm, sample_rate=24000)  # audio already in memory, one writev
+"""
+
+import os
+import struct
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+HEADER_SIZE = 44
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")  # Most buffers one writev call accepts
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = -1
+if IOV_MAX <= 0:
+    IOV_MAX = 1024  # POSIX minimum on Linux/macOS; sysconf gives -1 when indeterminate
+
+
+def wav_header(sample_rate, num_channels, sample_width, data_size=0, float_samples=False):
+    """Build a 44-byte canonical WAV header."""
+    audio_format = WAVE_FORMAT_IEEE_FLOAT if float_samples else WAVE_FORMAT_PCM
+    block_align = num_channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,              # ChunkSize (total file size - 8 bytes)
+        b"WAVE",
+        b"fmt ",
+        16,                          # Subchunk1Size
+        audio_format,
+        num_channels,
+        sample_rate,
+        sample_rate * block_align,   # ByteRate
+        block_align,
+        sample_width * 8,            # BitsPerSample
+        b"data",
+        data_size,                   # Subchunk2Size
+    )
+
+
+def parse_wav_header(data):
+    """
+    Read the format of a WAV file from its leading bytes.
+
+    The data chunk's declared size is ignored, since streamed WAV headers are
+    written before the length is known.
+
+    Returns:
+        (sample_rate, num_channels, sample_width, float_samples, data_offset)
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, offset)
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return (*fmt, offset + 8)
+        if chunk_id == b"fmt ":
+            audio_format, num_channels, sample_rate = struct.unpack_from("<HHI", data, offset + 8)
+            bits_per_sample, = struct.unpack_from("<H", data, offset + 22)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                audio_format, = struct.unpack_from("<H", data, offset + 32)  # SubFormat GUID prefix
+            fmt = (sample_rate, num_channels, bits_per_sample // 8, audio_format == WAVE_FORMAT_IEEE_FLOAT)
+        offset += 8 + chunk_size + (chunk_size % 2)
+    raise ValueError("WAV header is incomplete")
+
+
+def write_all(fd, buffers):
+    """Write bytes-like buffers to a file descriptor with writev (no joining), handling short writes."""
+    views = [memoryview(b).cast("B") for b in buffers]
+    views = [v for v in views if v.nbytes]
+    if not hasattr(os, "writev"):  # Windows
+        for view in views:
+            while view.nbytes:
+                view = view[os.write(fd, view):]
+        return
+    while views:
+        written = os.writev(fd, views[:IOV_MAX])
+        while views and written >= views[0].nbytes:
+            written -= views[0].nbytes
+            views.pop(0)
+        if views:
+            views[0] = views[0][written:]
+
+
+def write_wav(path, pcm, sample_rate, num_channels=1, sample_width=2, float_samples=False):
+    """Write a complete WAV file from in-memory sample data without copying it."""
+    data = memoryview(pcm).cast("B")
+    padding = data.nbytes % 2  # RIFF chunks are word aligned
+    header = bytearray(wav_header(sample_rate, num_channels, sample_width, data.nbytes, float_samples))
+    struct.pack_into("<I", header, 4, 36 + data.nbytes + padding)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        write_all(fd, [header, data, b"\x00" * padding])
+    finally:
+        os.close(fd)
+
+
+class WavWriter:
+    """Append-only WAV file whose header is fixed up on close."""
+
+    def __init__(self, path, sample_rate, num_channels=1, sample_width=2, float_samples=False):
+        """
+        Args:
+            path: Output file path
+            sample_rate: Frames per second
+            num_channels: Interleaved channel count
+            sample_width: Bytes per sample (2 = 16-bit PCM, 4 = 32-bit)
+            float_samples: Samples are IEEE float (use with sample_width=4)
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.sample_width = sample_width
+        self.float_samples = float_samples
+        self.data_size = 0
+        self._file = open(path, "wb")
+        self._file.write(wav_header(sample_rate, num_channels, sample_width, 0, float_samples))
+
+    @property
+    def frames_written(self):
+        return self.data_size // (self.num_channels * self.sample_width)
+
+    def write(self, data):
+        """Append interleaved sample data (any bytes-like object) without copying it."""
+        view = memoryview(data).cast("B")
+        self._file.write(view)
+        self.data_size += view.nbytes
+
+    def write_many(self, chunks):
+        """Append several sample buffers in one writev call."""
+        self._file.flush()
+        views = [memoryview(chunk).cast("B") for chunk in chunks]
+        write_all(self._file.fileno(), views)
+        self.data_size += sum(view.nbytes for view in views)
+
+    def close(self, fsync=False):
+        """Patch the RIFF and data chunk sizes and close the file (fsync'd if asked)."""
+        if self._file.closed:
+            return
+        padding = self.data_size % 2
+        if padding:
+            self._file.write(b"\x00")  # RIFF chunks are word aligned
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", 36 + self.data_size + padding))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self.data_size))
+        if fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()